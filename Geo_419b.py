@@ -1,962 +1,2524 @@
-# import packages
-import os
-import requests
-import zipfile
-import geopandas
-import pandas
-from osgeo import gdal
-
-
-def set_elev_variables(year):
-    """
-    Sets some variables that change depending on the specified year and returns them. However, if it is certain that
-    there is no data for the specified year "stop" is returned.
-
-    Parameters
-    ----------
-    year: int
-        The year of interest or one of the years ot interest.
-
-    Returns
-    -------
-    url_year: str
-        Part of the URL for the download of the elevation data.
-    dem_n: str
-        Part of the URL for the download of the elevation data.
-    elev_meta_file: str
-        Name of the meta data shapefile for the elevation data.
-    """
-    # set the variables if there could be data available for this year
-    if 2011 <= year <= 2013:
-        url_year = "2010-2013"
-        dem_n = "2"
-        elev_meta_file = "DGM2_2010-2013_Erfass-lt-Meta_UTM32-UTM_2014-12-10.shp"
-    elif 2014 <= year <= 2019:
-        url_year = "2014-2019"
-        dem_n = "1"
-        elev_meta_file = "DGM1_2014-2019_Erfass-lt-Meta_UTM_2020-04-20--17127.shp"
-    elif 2020 <= year <= 2025:
-        url_year = "2020-2025"
-        dem_n = "1"
-        elev_meta_file = "DGM1_2020-2025_Erfass-lt-Meta_UTM_2021-03--17127/" \
-                         "DGM1_2020-2025_Erfass-lt-Meta_UTM_2021-03--17127.shp"
-    # return stop if there is certainly no data available for this year
-    else:
-        return "stop", "stop", "stop"
-    # return the defined variables
-    return url_year, dem_n, elev_meta_file
-
-
-def data_download(type_to_download, data_list_to_download, url_year="", year=0, dem_n="", year_list=None,
-                  tile_number_list=None,  additional_check_2019=False):
-    """
-    Loops trough a list of data to download puts the URL(s) together and download the ZIP file(s). A list with the
-    name(s) of the downloaded file(s) is returned, if no files were downloaded "no_new_data" is returned.
-    Files are only downloaded, if the file or the content of the file is not already in the working directory.
-
-    Parameters
-    ----------
-    type_to_download: str
-        The type of the data to be downloaded.
-    data_list_to_download: list of str
-        A list that contains the part of the URL that is different for each data tile for all data tiles to be
-        downloaded.
-    url_year: str
-        Part of the URL for the download of the elevation data
-    year: int
-        The year of interest or one of the years ot interest.
-    dem_n: str
-        Part of the URL for the download of the elevation data
-    year_list: list of int or None, default=None
-        A list which contains the year of capture of each orthophoto to be downloaded.
-    tile_number_list: list of str or None, default=None
-         A list which contains the tile number of each orthophoto to be downloaded.
-    additional_check_2019: bool, default=False
-        Information on if this is an additional check for 2019 or not.
-    Returns
-    -------
-    zip_data_list: list of str
-        A list with the name(s) of of the downloaded file(s).
-    """
-    # the two following variables are used for the naming of the zip files (data kind = dgm, dom or las)
-    data_year = "_" + str(year)
-    data_kind = ""
-    # in this list the names of the zip files are stored
-    zip_data_list = []
-    # necessary for the orthophoto lists
-    index = 0
-    # for loop to download more than one file
-    for i in data_list_to_download:
-        # set the url, the one or two of the variables  used for the naming of the zip files and
-        # get the name of the zip file content and its hypothetically file path
-        # to be able to check if the file is  already present
-        url = ""
-        hy_file_path = """elevation_data/{}/{}/""".format(type_to_download, str(year))
-        file_name = ""
-        file_name_part_1 = ""
-        file_name_part_2 = ""
-        if type_to_download == "meta_data" or type_to_download == "auxiliary_data":
-            data_year = ""
-            if i == "url_id_data":
-                url = "https://raw.githubusercontent.com/Jon-Fr/Geo_419b/main/url_id_file.zip"
-                file_name = "url_id_file.csv"
-            else:
-                url = """https://geoportal.geoportal-th.de/hoehendaten/Uebersichten/Stand_{}.zip""".format(url_year)
-            if type_to_download == "auxiliary_data":
-                hy_file_path = """image_data/{}/""".format(type_to_download)
-            else:
-                hy_file_path = """elevation_data/{}/""".format(type_to_download)
-            if url_year == "2010-2013":
-                file_name = "DGM2_2010-2013_Erfass-lt-Meta_UTM32-UTM_2014-12-10.shp"
-            elif url_year == "2014-2019":
-                file_name = "DGM1_2014-2019_Erfass-lt-Meta_UTM_2020-04-20--17127.shp"
-            elif url_year == "2020-2025":
-                file_name = "DGM1_2020-2025_Erfass-lt-Meta_UTM_2021-03--17127"
-        if type_to_download == "dgm":
-            url = """https://geoportal.geoportal-th.de/hoehendaten/DGM/dgm_{}/dgm{}_{}_1_th_{}.zip""" \
-                .format(url_year, dem_n, i, url_year)
-            data_kind = "dgm_"
-            file_name = url[len(url) - 32:len(url) - 3] + "xyz"
-            if year >= 2020 or additional_check_2019 is True:
-                file_name = url[len(url) - 35:len(url) - 3] + "xyz"
-        if type_to_download == "dom":
-            url = """http://geoportal.geoportal-th.de/hoehendaten/DOM/dom_{}/dom{}_{}_1_th_{}.zip""" \
-                .format(url_year, dem_n, i, url_year)
-            data_kind = "dom_"
-            file_name = url[len(url) - 32:len(url) - 3] + "xyz"
-            if year >= 2020 or additional_check_2019 is True:
-                file_name = url[len(url) - 35:len(url) - 3] + "xyz"
-        if type_to_download == "las":
-            url = """http://geoportal.geoportal-th.de/hoehendaten/LAS/las_{}/las_{}_1_th_{}.zip""" \
-                .format(url_year, i, url_year)
-            data_kind = "las_"
-            file_name = url[len(url) - 32:len(url) - 3] + "laz"
-            if year >= 2020 or additional_check_2019 is True:
-                file_name = url[len(url) - 35:len(url) - 3] + "laz"
-        if type_to_download == "ortho":
-            data_year = ""
-            i = str(i)
-            url = """https://geoportal.geoportal-th.de/gaialight-th/_apps/dladownload/download.php?type=op&id={}""" \
-                .format(i)
-            hy_file_path = """image_data/orthophotos/{}""".format(str(year_list[index]))
-            file_name_part_1 = tile_number_list[index]
-            file_name_part_2 = str(year_list[index])
-        # set the name of the zip file
-        zip_name = data_kind + i + data_year + ".zip"
-        if type_to_download == "ortho":
-            zip_name = "orthophoto_" + tile_number_list[index] + "_" + str(year_list[index]) + ".zip"
-            index = index + 1
-        # append the zip file name to zip file name list
-        zip_data_list.append(zip_name[0:len(zip_name) - 4])
-        # download the zip data file if there is no file with the name that it would get and
-        # if the content of the zip file is not already present
-        if not os.path.exists(zip_name) and \
-                (not os.path.exists(hy_file_path + file_name) or type_to_download == "ortho"):
-            # extra check for orthophotos (necessary because the full filename is harder to predict/construct)
-            stop = False
-            if type_to_download == "ortho" and os.path.exists(hy_file_path):
-                file_list = os.listdir(hy_file_path)
-                for file in file_list:
-                    if file_name_part_1 in file and file_name_part_2 in file:
-                        stop = True
-                        break
-            if stop is True:
-                continue
-            # set variables for the loop
-            response = requests.get(url, stream=True)
-            data = open(zip_name, "wb")
-            # download and write data (downloading the data file in chunks is useful to save ram)
-            for chunk in response.iter_content(chunk_size=1024):
-                data.write(chunk)
-            # close data
-            data.close()
-    # return the zip file name list if it is not empty
-    if len(zip_data_list) > 0:
-        return zip_data_list
-    else:
-        return "no_new_data"
-
-
-def create_and_unzip(folder_path, zip_files):
-    """
-    Creates a folder (if it is not already existing) and unzip a list of ZIP files into it.
-    Before the function tries to unpacks a file, it checks whether this file actually exists in the working directory.
-
-    Parameters
-    ----------
-    folder_path: str
-        Path to / name of the folder to create.
-    zip_files: list of str
-        A list containing the names of the ZIP files to be unzipped.
-
-    Returns
-    -------
-    """
-    # create folder
-    if not os.path.exists(folder_path):
-        os.makedirs(folder_path)
-    # loop through the list
-    for zip_file in zip_files:
-        # add .zip if necessary
-        if ".zip" not in zip_file:
-            zip_file = zip_file + ".zip"
-        # check if file exist before trying to unzip it
-        if os.path.exists(zip_file):
-            # unzip the file
-            zipped_data = zipfile.ZipFile(zip_file, "r")
-            zipped_data.extractall(path=folder_path)
-            zipped_data.close()
-
-
-def intersect_geodfs(geodf_1, geodf_2):
-    """
-    Intersects two geodataframes and returns the intersected geodataframe. If the coordinate reference system (crs) of
-    the geodataframes is different the first geodataframe is re-projected to the crs of the second geodataframe.
-
-    Parameters
-    ----------
-    geodf_1: geopandas.geodataframe.GeoDataFrame
-        geodataframe 1
-    geodf_2: geopandas.geodataframe.GeoDataFrame
-        geodataframe 2
-
-    Returns
-    -------
-    intersected_geodf: geopandas.geodataframe.GeoDataFrame
-        intersected geodataframe
-    """
-    # re-project geodf_1 if necessary
-    re = geodf_2.crs == geodf_1.crs
-    if re is False:
-        geodf_1 = geodf_1.to_crs(geodf_2.crs)
-    # execute join / intersect
-    intersected_geodf = geopandas.sjoin(geodf_1, geodf_2, how="inner")
-    # return the result
-    return intersected_geodf
-
-
-def create_elev_download_list(elev_aoi, year, start_year, end_year, month_start_year, month_end_year,
-                              additional_check):
-    """
-    Creates a list that contains the part of the URL that is different for each data tile for all data tiles to be
-    downloaded and returns that list. If there is no data for the specified year, stop is returned.
-
-    Parameters
-    ----------
-    elev_aoi: geopandas.geodataframe.GeoDataFrame
-        The Intersected geodataframe of the area of interest and the metadata geodataframe.
-    year: int
-        The year of interest or one of the years ot interest.
-    start_year: int
-        First year of interest.
-    end_year: int
-        Last year of interest.
-    month_start_year: int
-        First month of interest.
-    month_end_year: int
-        Last month of interest.
-    additional_check: str
-        Is this an additional check.
-
-    Returns
-    -------
-    elev_download_list: list of str
-         A list that contains the part of the URL that is different for each data tile for all data tiles to be
-         downloaded.
-    """
-    # month list
-    m_l = ["-01", "-02", "-03", "-04", "-05", "-06", "-07", "-08", "-09", "-10", "-11", "-12"]
-    # exclude the months that should not be checked
-    if year == start_year and month_start_year != 1:
-        for i in range(0, month_start_year - 1):
-            m_l[i] = m_l[month_start_year - 1]
-    if year == end_year and month_end_year != 12:
-        for i in range(month_end_year, 12):
-            m_l[i] = m_l[month_end_year - 1]
-    # filter by date to find the relevant tiles
-    year = str(year)
-    filtered_data = elev_aoi[(elev_aoi["ERFASSUNG"] == year + m_l[0]) | (elev_aoi["ERFASSUNG"] == year + m_l[1]) |
-                             (elev_aoi["ERFASSUNG"] == year + m_l[2]) | (elev_aoi["ERFASSUNG"] == year + m_l[3]) |
-                             (elev_aoi["ERFASSUNG"] == year + m_l[4]) | (elev_aoi["ERFASSUNG"] == year + m_l[5]) |
-                             (elev_aoi["ERFASSUNG"] == year + m_l[6]) | (elev_aoi["ERFASSUNG"] == year + m_l[7]) |
-                             (elev_aoi["ERFASSUNG"] == year + m_l[8]) | (elev_aoi["ERFASSUNG"] == year + m_l[9]) |
-                             (elev_aoi["ERFASSUNG"] == year + m_l[10]) | (elev_aoi["ERFASSUNG"] == year + m_l[11])]
-    # if there is no data return stop
-    if len(filtered_data) == 0:
-        return "stop"
-    # create list of the relevant tiles
-    # since the meta data is not uniform, an if else statement is necessary
-    if year < "2014" and additional_check != "check" or year == "2014" and additional_check == "check":
-        temp_list = list(filtered_data["DGM_1X1"])
-        elev_download_list = []
-        for i in temp_list:
-            name = i[2:len(i)]
-            elev_download_list.append(name)
-    else:
-        elev_download_list = list(filtered_data["NAME_right"])
-    # return the list of relevant tiles
-    return elev_download_list
-
-
-def delete_zip_files(zip_files):
-    """
-    Deletes one or more ZIP files. Before the function tries to delete a file, it checks whether
-    this file actually exists in the working directory.
-
-    Parameters
-    ----------
-    zip_files: list of str
-        A list containing the names of the ZIP files to be deleted.
-
-    Returns
-    -------
-    """
-    # for loop to cycle through the whole list
-    for i in zip_files:
-        # check if the zip file to delete actually exist
-        if os.path.exists(i + ".zip"):
-            # delete the zip file
-            os.remove(i + ".zip")
-
-
-def c_tile_number_df(geodf):
-    """
-    Creates and returns a dataframe that contains the tile numbers of a geodataframe.
-
-    Parameters
-    ----------
-    geodf: geopandas.geodataframe.GeoDataFrame
-        The Intersected geodataframe of the area of interest and the tile number geodataframe.
-
-    Returns
-    -------
-    df: pandas.core.frame.DataFrame
-         That contains the tile numbers.
-    """
-    # get the relevant tile_numbers
-    tile_number_list = list()
-    temp_list = list(geodf["DGM_1X1"])
-    for tile_number in temp_list:
-        tile_number_list.append(tile_number[2:])
-    # create the df
-    data = {"tile_number": tile_number_list}
-    df = pandas.DataFrame(data)
-    return df
-
-
-def split_df(df):
-    """
-    Splits a dataframe into two (based on the year) and returns a list that contains the two new dataframes.
-
-    Parameters
-    ----------
-    df: pandas.core.frame.DataFrame
-        The dataframe to be split.
-
-    Returns
-    -------
-    list_: list of pandas.core.frame.DataFrames
-        A list containing the new dataframes.
-    """
-    list_ = list()
-    # create df for the years before 2019 and for 2019 and later
-    df_before_2019 = df[df["year"] < 2019]
-    df_after_2018 = df[df["year"] >= 2019]
-    # append dfs to list
-    list_.append(df_after_2018)
-    list_.append(df_before_2019)
-    return list_
-
-
-def get_relevant_url_ids(url_id_df, tile_number_df, start_year, end_year):
-    """
-    Creates and returns three list that are needed for the download of the orthophotos and one list contacting the years
-    where orthophotos are available only for a part of the area of interest. To accomplish this, several dataframe
-    operations are performed.
-
-    Parameters
-    ----------
-    url_id_df: pandas.core.frame.DataFrame
-        Dataframe with the the ID part of all URLs, the years and the tile numbers as columns.
-    tile_number_df: pandas.core.frame.DataFrame
-        Dataframe containing all relevant tile numbers.
-    start_year: int
-        First year or interest.
-    end_year:
-        Last year of interest.
-
-    Returns
-    -------
-    url_id_list: list of str
-        A list which contains the ID part of the URL for each orthophoto downloaded.
-    year_list: list of int
-        A list which contains the year of capture of each orthophoto to be downloaded.
-    tile_number_list: list of str
-         A list which contains the tile number of each orthophoto to be downloaded.
-    partly_data_list: list of int
-        A list contacting the years where orthophotos are available only for a part of the area of interest.
-    """
-    # check if the years are before 2019
-    if end_year < 2019 or url_id_df.iloc[0]["year"] < 2019 and start_year < 2019:
-        # add additional tile numbers to the tile_number_df if necessary
-        i = 0
-        while i < len(tile_number_df):
-            # split the tile number df
-            split = tile_number_df.iloc[i]["tile_number"].split("_")
-            # check if it could be necessary to add a tile number and if yes create it
-            # check if the "new" tile number is already in the df if no replace the unnecessary tile number
-            # if yes delete the the unnecessary tile number
-            if int(split[0]) % 2 != 0 and int(split[1]) % 2 == 0:
-                new_part_1 = int(split[0]) - 1
-                new_tile_number = str(new_part_1) + "_" + split[1]
-                if new_tile_number not in tile_number_df.values:
-                    tile_number_df.iloc[i]["tile_number"] = new_tile_number
-                    i = i + 1
-                else:
-                    tile_number_df = tile_number_df.drop(tile_number_df.index[i])
-            elif int(split[0]) % 2 == 0 and int(split[1]) % 2 != 0:
-                new_part_2 = int(split[1]) - 1
-                new_tile_number = split[0] + "_" + str(new_part_2)
-                if new_tile_number not in tile_number_df.values:
-                    tile_number_df.iloc[i]["tile_number"] = new_tile_number
-                    i = i + 1
-                else:
-                    tile_number_df = tile_number_df.drop(tile_number_df.index[i])
-            elif int(split[0]) % 2 != 0 and int(split[1]) % 2 != 0:
-                new_part_1 = int(split[0]) - 1
-                new_part_2 = int(split[1]) - 1
-                new_tile_number = str(new_part_1) + "_" + str(new_part_2)
-                if new_tile_number not in tile_number_df.values:
-                    tile_number_df.iloc[i]["tile_number"] = new_tile_number
-                    i = i + 1
-                else:
-                    tile_number_df = tile_number_df.drop(tile_number_df.index[i])
-            else:
-                i = i + 1
-                continue
-    # execute inner join
-    joined_df = pandas.merge(url_id_df, tile_number_df)
-    # filter relevant years
-    filtered_df = joined_df[(joined_df["year"] >= start_year) & (joined_df["year"] <= end_year)]
-    # store relevant url_ids acquisition years and tile numbers in lists and return them
-    url_id_list = list(filtered_df["url_id"])
-    year_list = list(filtered_df["year"])
-    tile_number_list = list(filtered_df["tile_number"])
-    # check if there are orthophotos available for the whole aoi for each year (only necessary for years before 2018)
-    # add years where this is not the case to a list and return that list
-    partly_data_list = []
-    if end_year < 2019 or url_id_df.iloc[0]["year"] < 2019 and start_year < 2019:
-        for year in range(start_year, end_year + 1):
-            if year < 2018:
-                year_df = filtered_df[(filtered_df["year"] == year)]
-                if len(year_df) < len(tile_number_df) and len(year_df) != 0:
-                    partly_data_list.append(year)
-    return url_id_list, year_list, tile_number_list, partly_data_list
-
-
-class GeoFileHandler:
-    """
-    class to represent a folder with geo-files
-
-    Attributes
-    ----------
-    path: str
-        path of the directory which contains the folder
-    folder_name: str
-        name of the folder
-    geo_file_list: list of dict
-        a list of dict of {str, array[int]} which contains the absolute path and
-        extension [minX, minY, maxX, maxY] of a geo-file
-    file_list: list of str
-        list of absolute paths of all files created from geo_file_list because
-        its needed gdal.BuildVRT() in method create_vrt
-    extension: array of int
-        array with [minX, minY, maxX, maxY] for all files
-    """
-    def __init__(self, path, folder_name, geo_file_list):
-        """
-        Construct all necessary attributes for the objects.
-        Calculates the the extension of all rasters for the raster mosaic
-        path: str
-            path of the directory with the folder
-        folder_name: str
-            name of the folder
-        geo_file_list: list of dict
-            a list of dict of {str, array[int]} which contains the absolute path and
-            extension [minX, minY, maxX, maxY] of a geo-file
-        """
-        self.folder = path + "/" + folder_name
-        self.name = folder_name
-        self.geo_file_list = geo_file_list
-        full_extent = []
-        self.file_list = []
-        for i in range(len(geo_file_list)):
-            self.file_list.append(geo_file_list[i]["file"])
-            # needed for gdal.BuildVRT() in method create_vrt
-            if i == 0:
-                # extent of first raster is full extent temporary
-                full_extent = geo_file_list[i]["extent"]
-            else:
-                for key in [0, 1]:
-                    # if new minimum
-                    if geo_file_list[i]["extent"][key] < full_extent[key]:
-                        full_extent[key] = geo_file_list[i]["extent"][key]
-                for key in [2, 3]:
-                    # if new maximum
-                    if geo_file_list[i]["extent"][key] > full_extent[key]:
-                        full_extent[key] = geo_file_list[i]["extent"][key]
-        self.extent = full_extent
-
-    def create_vrt(self, name, epsg="EPSG: 25832"):
-        """
-        creates a raster-mosaic using gdal.BuildVRT and export as GeoTiff in choosable crs
-
-        Parameters
-        ----------
-        name: str
-            name of the GeoTiff
-        epsg: str, default=EPSG: 25832
-            EPSG-code of chosen crs
-
-        Returns
-        -------
-        """
-        # build vrt
-        opts = gdal.BuildVRTOptions(outputBounds=self.extent)
-        vrt = gdal.BuildVRT(self.folder + "/"+name+".vrt", self.file_list, options=opts)
-        # warp in chosen crs
-        vrt_warped = gdal.Warp("", vrt, dstSRS=epsg, format='vrt')
-        # write as GeoTiff
-        gdal.Translate(self.folder + "/"+name+".tif", vrt_warped, format='GTiff',
-                       creationOptions=['COMPRESS:DEFLATE', 'TILED:YES'])
-
-
-def go_through_all_raster(dir, ending, file_cor=None):
-    """
-    go through all raster of path including subfolders. Calling the function raster_correction (file_cor given)
-    or create_geo_file_dic (no file_cor given) to get the a dictionary with file end extent. For each subfolder
-    an instance of the class GeoFileHandler is created. All Objects of GeoFileHandler are returned as a list.
-
-    Parameters
-    ----------
-    dir: str
-        directory with subfolders, witch contains all raster datasets
-    ending: str
-        file extension of the raster dataset (f.e. .tif)
-    file_cor: str or None, default=None
-        path of a file for raster correction
-
-    Returns
-    -------
-    geo_file_handler_list: list of GeoFileHandler
-        list  with instances of GeoFileHandler for every subfolder
-    """
-    folder_list = os.listdir(dir)
-    geo_file_handler_list = []
-    for i1 in range(len(folder_list)):
-        # loop through every folder in directory
-        file_list = os.listdir(dir + "/" + folder_list[i1])
-        out_file_list = []
-        for i2 in range(len(file_list)):
-            # loop through every subfolder in folder
-            if file_list[i2].endswith(ending):
-                if file_cor is not None:
-                    out_file_list.append(raster_correction(dir + "/" + folder_list[i1], file_list[i2],
-                                                           file_cor, ending))
-                else:
-                    out_file_list.append(create_geo_file_dic(dir + "/" + folder_list[i1], file_list[i2]))
-        geo_file_handler_list.append(GeoFileHandler(dir, folder_list[i1], out_file_list))
-    return geo_file_handler_list
-
-
-def create_geo_file_dic(dir, file):
-    """
-    calculate the geometric extension of a raster
-
-    Parameters
-    ----------
-    dir: str
-        directory
-    file: str
-        name of th file
-
-    Returns
-    -------
-    dict
-        dict of {str: array[int]} with the path as str and an array with the geometric extension with
-        the following values [minX, minY, maxX, maxY]
-    """
-    raster_str = dir + "/" + file
-    raster = gdal.Open(raster_str)
-    gt = raster.GetGeoTransform()
-    x_size = raster.RasterXSize
-    y_size = raster.RasterYSize
-    extent = [gt[0], gt[3] + gt[5] * y_size,
-              gt[0] + gt[1] * x_size, gt[3]]
-    return {"file": raster_str, "extent": extent}
-
-
-def raster_correction(dir, file_raster, file_cor, ending, epsg="EPSG: 25832"):
-    """
-    corrects every raster value by addition with a second raster (correction file).
-    Writes the result as a new GeoTiff by replacing the original file extension with _UTM_cor.tif
-
-    Parameters
-    ----------
-    dir: str
-        directory
-    file_raster: str
-        name of the input raster
-    file_cor: str
-        path of the correction-raster-file
-    ending: str
-        file extension of the input raster
-    epsg: str, optional, default=EPSG: 25832
-        EPSG-code of the input raster. just necessary if not EPSG: 25832
-
-    Returns
-    -------
-    dict
-        dict of {str: array[int]} with the path as str and an array with the geometric extension with
-        the following values [minX, minY, maxX, maxY] for the calculated raster
-    """
-    raster_str = dir + "/" + file_raster
-    out_file = raster_str.replace(ending, "_UTM_cor.tif")
-    # open raster
-    raster = gdal.Open(raster_str)
-    gt = raster.GetGeoTransform()
-    x_size = raster.RasterXSize
-    y_size = raster.RasterYSize
-    # calculate extension
-    extent = [gt[0], gt[3] + gt[5] * y_size,
-              gt[0] + gt[1] * x_size, gt[3]]
-    # [minX, minY, maxX, maxY]
-
-    # warp correction, so that it matches the input raster in crs, extension and resolution
-    cor_warp = gdal.Warp("",
-                         file_cor,
-                         dstSRS=epsg,
-                         xRes=gt[1],
-                         yRes=gt[5],
-                         resampleAlg='bilinear',
-                         outputBounds=extent,
-                         format="vrt")
-    # correction
-    data_out = raster.GetRasterBand(1).ReadAsArray() + cor_warp.GetRasterBand(1).ReadAsArray()
-    # driver for output
-    driver = gdal.GetDriverByName("GTiff")
-    ds_out = driver.Create(out_file, x_size, y_size, 1, gdal.GDT_UInt16)
-    ds_out.SetGeoTransform(cor_warp.GetGeoTransform())  # sets same geotransform as input
-    ds_out.SetProjection(cor_warp.GetProjection())  # sets same projection as input
-    band_out = ds_out.GetRasterBand(1)
-    band_out.WriteArray(data_out)
-    return {"file": out_file, "extent": extent}
-
-
-# main function
-def auto_download(working_dir, path_shp, start_year_elev=None, month_start_year=1, end_year_elev=None,
-                  month_end_year=12, start_year_ortho=None, end_year_ortho=None, dgm=True, dom=True, las=True,
-                  ortho=True, file_cor_dgm=None, epsg_mosaic="EPSG: 25832", merge_dgm=True, merge_dom=True,
-                  merge_ortho=True, delete=True,):
-    """
-    The main function of the script, through the parameters of this function one can control the download of the
-    elevation data and orthophoto as well as the further processing of them (height correction and merging).
-    Depending on the parameters, the other functions of the script are called within this function to download the data
-    and perform the processing.
-
-    Parameters
-    ----------
-    working_dir: str
-        Path to the directory where the output is to be stored.
-    path_shp: str
-        Path to the shapefile of the area of interest.
-    start_year_elev: int or None, default=None
-        first year of interest for the elevation data
-    month_start_year: int, default=1
-        first month of interest for the elevation data
-    end_year_elev: int or None, default=None
-        last year of interest for the elevation data
-    month_end_year: int, default=12
-        last month of interest for the elevation data
-    start_year_ortho: int or None, default=None
-        first year of interest for the orthophotos
-    end_year_ortho: int or None, default=None
-        last year of interest for the orthophotos
-    dgm: bool, default=True
-        Are digital terrain models to be downloaded.
-    dom: bool, default=True
-        Are digital surface models to be downloaded.
-    las: bool, default=True
-        Should laser scanner data be downloaded.
-    ortho: bool, default=True
-        Should orthophotos be downloaded.
-    file_cor_dgm: str or None
-        Path to the height correction file.
-    epsg_mosaic: str, default=EPSG: 25832
-        EPSG-code of the merged mosaics.
-    merge_dgm: bool, default=True
-        Should the digital terrain models be merged.
-    merge_dom: bool, default=True
-        Should the digital surface models be merged.
-    merge_ortho: bool, default=True
-        Should the orthophotos be merged.
-    delete: bool, default=True
-        Should the Zip files be deleted.
-    Returns
-    -------
-    """
-    # ---------- both ---------- #
-    # set working directory
-    os.chdir(working_dir)
-    # set aoi file path
-    aoi_fp = path_shp
-    # load the aoi shapefile as geodataframe
-    aoi = geopandas.read_file(aoi_fp)
-    # create a list in which the names of all zip files are stored
-    # so that they can be deleted at the end of the function
-    zip_files_to_delete = []
-
-    # ---------- elevation data ---------- #
-    # check if the user made the required specifications
-    if start_year_elev is not None and end_year_elev is not None:
-        # create some variables that are needed, because for some years an additional check is needed
-        # this is due to the fact that the data collection periods partly overlap
-        additional_check = "false"
-        length_of_download_list = 0
-        no_data_av = "?"
-        partly_data_av = "?"
-        additional_check_2019 = False
-        # loop to cover each year
-        year = start_year_elev
-        while year <= end_year_elev:
-            # check if there could be elevation data available for this year if not give the user feedback
-            if dgm is True or dom is True or las is True:
-                url_year, dem_n, elev_meta_file = set_elev_variables(year=year)
-                if url_year == "stop":
-                    print("There is no elevation data available prior to 2011.")
-                    # prevents unnecessary loop cycles
-                    if year < 2011 <= end_year_elev:
-                        year = 2010
-                    else:
-                        break
-                else:
-                    # changes because of additional check
-                    if additional_check == 2014:
-                        url_year, dem_n, elev_meta_file = set_elev_variables(year=year - 1)
-                        additional_check = "check"
-                        end_year_elev = end_year_elev - 1
-                    # download meta data
-                    meta_data_name = data_download(data_list_to_download=["meta_data_elevation_data_" + url_year],
-                                                   year=year, type_to_download="meta_data", url_year=url_year)
-                    # create folder for elevation data and unzip meta_data if necessary
-                    # add the zip name to the list of zip files that are to delete
-                    if meta_data_name != "no_new_data" or os.path.exists("elevation_data/meta_data" +
-                                                                         url_year + ".zip"):
-                        zip_files_to_delete.append("meta_data_elevation_data_" + url_year)
-                        create_and_unzip(folder_path="elevation_data/meta_data",
-                                         zip_files=["meta_data_elevation_data_" + url_year])
-                    # load meta_data shapefile as a geodataframe
-                    elev_meta_data_geodf = geopandas.read_file("elevation_data/meta_data/" + elev_meta_file)
-                    # intersect meta data and aoi geodataframe
-                    elev_meta_data_aoi = intersect_geodfs(geodf_1=aoi, geodf_2=elev_meta_data_geodf)
-                    # changes because of additional check
-                    if additional_check == 2013 or additional_check == 2019:
-                        if additional_check == 2019:
-                            additional_check_2019 = True
-                        year = year - 1
-                        additional_check = "check"
-                        end_year_elev = end_year_elev - 1
-                    # get download list
-                    elev_download_list = create_elev_download_list(elev_aoi=elev_meta_data_aoi, year=year,
-                                                                   start_year=start_year_elev,
-                                                                   end_year=end_year_elev,
-                                                                   month_start_year=month_start_year,
-                                                                   month_end_year=month_end_year,
-                                                                   additional_check=additional_check)
-                    # detect if an additional check should be executed for this year
-                    if year == 2013 and additional_check != 2013 and additional_check != "check":
-                        if end_year_elev == 2013 and month_end_year != 12:
-                            additional_check = "false"
-                        else:
-                            additional_check = 2013
-                            end_year_elev = end_year_elev + 1
-                    if year == 2014 and additional_check != 2014 and additional_check != "check":
-                        if end_year_elev == 2014 and month_end_year == 1 or \
-                                start_year_elev == 2014 and month_start_year > 2:
-                            additional_check = "false"
-                        else:
-                            additional_check = 2014
-                            end_year_elev = end_year_elev + 1
-                    if year == 2019 and additional_check != 2019 and additional_check != "check":
-                        if end_year_elev == 2019 and month_end_year < 11:
-                            additional_check = "false"
-                        else:
-                            additional_check = 2019
-                            end_year_elev = end_year_elev + 1
-                    # if the download list is empty give the user feedback about it and skip the rest of this loop cycle
-                    # but if there is an additional check pending for this year give no feedback yet because there is
-                    # still a chance that data for this year and region is available
-                    if elev_download_list == "stop" and length_of_download_list == 0:
-                        if additional_check != 2013 and additional_check != 2014 and additional_check != 2019 and \
-                                (no_data_av == "probably" or additional_check != "check") and \
-                                partly_data_av != "probably":
-                            print("There is no elevation data available for the area for " + str(year) + ".")
-                            if year == start_year_elev and month_start_year != 1 or\
-                                    year == end_year_elev and month_end_year != 12:
-                                print("At least for the selected months.")
-                        else:
-                            no_data_av = "probably"
-                        # adjustments due to the additional check
-                        if additional_check == "check":
-                            additional_check_2019 = False
-                            no_data_av = "?"
-                            additional_check = "false"
-                        if additional_check == 2014:
-                            year = year - 1
-                        year = year + 1
-                        continue
-                    # if there is only data for part of the AOI inform the user about it but if there is an additional
-                    # check pending for this year give no feedback yet because there is  still a chance that data
-                    # for this year and region is available
-                    if elev_download_list == "stop":
-                        elev_download_list = ""
-                    if len(elev_download_list) + length_of_download_list < len(elev_meta_data_aoi):
-                        if additional_check != 2013 and additional_check != 2014 and additional_check != 2019:
-                            print("Only for a part of the area there is elevation data available for " +
-                                  str(year) + ".")
-                        # save the length of the download list before the additional check if there is a check pending
-                        else:
-                            length_of_download_list = len(elev_download_list)
-                            if additional_check == 2013 or additional_check == 2014 or additional_check == 2019:
-                                partly_data_av = "probably"
-                    # download the data,
-                    # if data was downloaded add the zip names to the list of zip files that are to delete
-                    if dgm is True and len(elev_download_list) != 0:
-                        elev_data_list = data_download(type_to_download="dgm", url_year=url_year, year=year,
-                                                       data_list_to_download=elev_download_list, dem_n=dem_n,
-                                                       additional_check_2019=additional_check_2019)
-                        if elev_data_list != "no_new_data":
-                            create_and_unzip(folder_path="elevation_data/dgm/" + str(year), zip_files=elev_data_list)
-                            zip_files_to_delete.extend(elev_data_list)
-
-                    if dom is True and elev_download_list != "stop":
-                        elev_data_list = data_download(type_to_download="dom", url_year=url_year, year=year,
-                                                       data_list_to_download=elev_download_list, dem_n=dem_n,
-                                                       additional_check_2019=additional_check_2019)
-                        if elev_data_list != "no_new_data":
-                            create_and_unzip(folder_path="elevation_data/dom/" + str(year), zip_files=elev_data_list)
-                            zip_files_to_delete.extend(elev_data_list)
-                    if las is True and len(elev_download_list) != 0:
-                        elev_data_list = data_download(type_to_download="las", url_year=url_year, year=year,
-                                                       data_list_to_download=elev_download_list, dem_n=dem_n,
-                                                       additional_check_2019=additional_check_2019)
-                        if elev_data_list != "no_new_data":
-                            create_and_unzip(folder_path="elevation_data/las/" + str(year), zip_files=elev_data_list)
-                            zip_files_to_delete.extend(elev_data_list)
-            year = year + 1
-            # adjustments due to the additional check
-            if additional_check == 2014:
-                year = year - 1
-            if additional_check == "check":
-                additional_check_2019 = False
-                no_data_av = "?"
-                partly_data_av = "?"
-                additional_check = "false"
-                length_of_download_list = 0
-
-    # ---------- image data ---------- #
-    # check if the user made the required specifications
-    if ortho is True and start_year_ortho is not None and end_year_ortho is not None:
-        # download shp with tile numbers if necessary (auxiliary data)
-        aux_data_name = data_download(data_list_to_download=["meta_data_elevation_data_" + "2010-2013"],
-                                      type_to_download="auxiliary_data", url_year="2010-2013")
-        # create folder for image data and unzip auxiliary data if necessary
-        if aux_data_name != "no_new_data" or not os.path.exists("image_data/auxiliary_data"):
-            zip_files_to_delete.extend(aux_data_name)
-            create_and_unzip(folder_path="image_data/auxiliary_data",
-                             zip_files=["meta_data_elevation_data_" + "2010-2013"])
-        # load tile_number_shp as a geodataframe
-        tile_number_geodf = geopandas.read_file("image_data/auxiliary_data/" +
-                                                "DGM2_2010-2013_Erfass-lt-Meta_UTM32-UTM_2014-12-10.shp")
-        # intersect aoi and tile_number_geodf
-        aoi_tile_numbers_geodf = intersect_geodfs(geodf_1=aoi, geodf_2=tile_number_geodf)
-        # create tile number df
-        tile_number_df = c_tile_number_df(geodf=aoi_tile_numbers_geodf)
-        # download url_id_file if necessary
-        url_id_data = data_download(data_list_to_download=["url_id_data"], type_to_download="auxiliary_data")
-        # extract url_id_file if necessary
-        # add the zip name to the list of zip files that are to delete
-        if url_id_data != "no_new_data" or not os.path.exists("image_data/auxiliary_data/url_id_file.csv"):
-            zip_files_to_delete.extend(url_id_data)
-            create_and_unzip(folder_path="image_data/auxiliary_data/", zip_files=["url_id_data"])
-        # load url id file as df
-        url_id_df = pandas.read_csv("image_data/auxiliary_data/url_id_file.csv")
-        # before 2019 the orthophoto covers a 2x2 km area and this affects the tile numbers
-        # split url_id_df (if necessary)
-        if end_year_ortho >= 2019 and start_year_ortho < 2019:
-            url_id_df_list = split_df(df=url_id_df)
-            # get the relevant url ids, years and tile numbers
-            url_id_list, year_list, tile_number_list, partly_data_list = get_relevant_url_ids(
-                url_id_df=url_id_df_list[0],
-                tile_number_df=tile_number_df,
-                start_year=start_year_ortho,
-                end_year=end_year_ortho)
-            url_id_list_2, year_list_2, tile_number_list_2, partly_data_list_2 = get_relevant_url_ids(
-                url_id_df=url_id_df_list[1],
-                tile_number_df=tile_number_df,
-                start_year=start_year_ortho,
-                end_year=end_year_ortho)
-            url_id_list.extend(url_id_list_2)
-            year_list.extend(year_list_2)
-            tile_number_list.extend(tile_number_list_2)
-            partly_data_list.extend(partly_data_list_2)
-        else:
-            url_id_list, year_list, tile_number_list, partly_data_list = get_relevant_url_ids(
-                url_id_df=url_id_df,
-                tile_number_df=tile_number_df,
-                start_year=start_year_ortho,
-                end_year=end_year_ortho)
-        # inform the user if there are no orthophotos available
-        for year in range(start_year_ortho, end_year_ortho + 1):
-            if (year in year_list) is False:
-                print("There are no orthophotos available for the area for " + str(year) + ".")
-        # inform the user if the orthophotos available for a year does not cover the whole aoi
-        for year in partly_data_list:
-            print("Only for a part of the area there are orthophotos available available for " + str(year) + ".")
-        # download orthophotos
-        image_data = data_download(type_to_download="ortho", data_list_to_download=url_id_list,
-                                   year_list=year_list, tile_number_list=tile_number_list)
-        # if data was downloaded unzip it and add the zip names to the list of zip files that are to delete
-        if image_data != "no_new_data":
-            zip_files_to_delete.extend(image_data)
-            # loop to create a new folder for each year
-            index = 0
-            for zip_file_name in image_data:
-                create_and_unzip(folder_path="image_data/orthophotos/" + str(year_list[index]),
-                                 zip_files=[zip_file_name])
-                index = index + 1
-
-    # ---------- both ---------- #
-    # dgm correction and raster merging
-    if file_cor_dgm is not None:
-        geo_file_handler_list = go_through_all_raster("./elevation_data/dgm", ".xyz", file_cor_dgm)
-        if merge_dgm is True:
-            for i in range(len(geo_file_handler_list)):
-                geo_file_handler_list[i].create_vrt("dgm_mosaic_"+geo_file_handler_list[i].name, epsg_mosaic)
-    else:
-        if merge_dgm is True:
-            geo_file_handler_list = go_through_all_raster("./elevation_data/dgm", ".xyz")
-            for i in range(len(geo_file_handler_list)):
-                geo_file_handler_list[i].create_vrt("dgm_mosaic_"+geo_file_handler_list[i].name, epsg_mosaic)
-    if merge_dom is True:
-        geo_file_handler_list = go_through_all_raster("./elevation_data/dom", ".xyz")
-        for i in range(len(geo_file_handler_list)):
-            geo_file_handler_list[i].create_vrt("dom_mosaic_"+geo_file_handler_list[i].name, epsg_mosaic)
-    if merge_ortho is True:
-        geo_file_handler_list = go_through_all_raster("./image_data/orthophotos", ".tif")
-        for i in range(len(geo_file_handler_list)):
-            geo_file_handler_list[i].create_vrt("ortho_mosaic_"+geo_file_handler_list[i].name, epsg_mosaic)
-
-    # if it is wanted delete the zip files
-    if delete is True:
-        delete_zip_files(zip_files=zip_files_to_delete)
+# import packages
+import os
+import concurrent.futures
+import contextlib
+import hashlib
+import json
+import math
+import mmap
+import pathlib
+import re
+import shutil
+import sqlite3
+import threading
+import time
+import requests
+import zipfile
+import geopandas
+import numpy
+import pandas
+from osgeo import gdal
+import _aux
+
+
+# the collection periods of the elevation data (URL part, first and last month of capture in the meta data)
+ELEVATION_PERIODS = [("2010-2013", "2011-01", "2014-02"),
+                     ("2014-2019", "2013-12", "2019-12"),
+                     ("2020-2025", "2019-11", "2025-12")]
+
+
+def set_elev_variables(year):
+    """
+    Sets some variables that change depending on the specified year and returns them. However, if it is certain that
+    there is no data for the specified year "stop" is returned.
+
+    Parameters
+    ----------
+    year: int
+        The year of interest or one of the years ot interest.
+
+    Returns
+    -------
+    url_year: str
+        Part of the URL for the download of the elevation data.
+    dem_n: str
+        Part of the URL for the download of the elevation data.
+    elev_meta_file: str
+        Name of the meta data shapefile for the elevation data.
+    """
+    # set the variables if there could be data available for this year
+    if 2011 <= year <= 2013:
+        url_year = "2010-2013"
+        dem_n = "2"
+        elev_meta_file = "DGM2_2010-2013_Erfass-lt-Meta_UTM32-UTM_2014-12-10.shp"
+    elif 2014 <= year <= 2019:
+        url_year = "2014-2019"
+        dem_n = "1"
+        elev_meta_file = "DGM1_2014-2019_Erfass-lt-Meta_UTM_2020-04-20--17127.shp"
+    elif 2020 <= year <= 2025:
+        url_year = "2020-2025"
+        dem_n = "1"
+        elev_meta_file = "DGM1_2020-2025_Erfass-lt-Meta_UTM_2021-03--17127/" \
+                         "DGM1_2020-2025_Erfass-lt-Meta_UTM_2021-03--17127.shp"
+    # return stop if there is certainly no data available for this year
+    else:
+        return "stop", "stop", "stop"
+    # return the defined variables
+    return url_year, dem_n, elev_meta_file
+
+
+def data_download(type_to_download, data_list_to_download, url_year="", year=0, dem_n="", year_list=None,
+                  tile_number_list=None,  additional_check_2019=False, workers=4, extract=False, manifest=None,
+                  refresh=False, ortho_index=None, plan=None, job_list=None):
+    """
+    Loops trough a list of data to download puts the URL(s) together and download the ZIP file(s). A list with the
+    name(s) of the downloaded file(s) is returned, if no files were downloaded "no_new_data" is returned.
+    Files are only downloaded, if the file or the content of the file is not already in the working directory.
+    The downloads are executed concurrently by a pool of workers that share one session with pooled keep-alive
+    connections. If extract is True, the relevant content of each data tile is extracted into its folder as soon as
+    the download of the tile is finished and the ZIP file is deleted right after.
+    If a manifest is given, it is used to decide whether a data tile is already present. Data tiles which have been
+    extracted in another working directory are linked or copied from there instead of being downloaded again.
+
+    Parameters
+    ----------
+    type_to_download: str
+        The type of the data to be downloaded.
+    data_list_to_download: list of str
+        A list that contains the part of the URL that is different for each data tile for all data tiles to be
+        downloaded.
+    url_year: str
+        Part of the URL for the download of the elevation data
+    year: int
+        The year of interest or one of the years ot interest.
+    dem_n: str
+        Part of the URL for the download of the elevation data
+    year_list: list of int or None, default=None
+        A list which contains the year of capture of each orthophoto to be downloaded.
+    tile_number_list: list of str or None, default=None
+         A list which contains the tile number of each orthophoto to be downloaded.
+    additional_check_2019: bool, default=False
+        Information on if this is an additional check for 2019 or not.
+    workers: int, default=4
+        Number of concurrent downloads (1 means that the files are downloaded one after another).
+    extract: bool, default=False
+        Should the data tiles (dgm, dom, las and ortho) be extracted directly after their download.
+    manifest: TileManifest or None, default=None
+        The manifest in which the downloaded data tiles are recorded.
+    refresh: bool, default=False
+        Should data tiles that are recorded in the manifest be requested again if they changed on the server
+        (conditional request with ETag / Last-Modified).
+    ortho_index: dict or None, default=None
+        Index of the orthophotos that are already present (see index_orthophotos). If None, the index is created.
+        The index is updated with the downloaded orthophotos.
+    plan: list or None, default=None
+        If a list is given, nothing is downloaded. Instead, a dict of {str: str or int} with the type ("type"), year
+        ("year"), URL ("url") and ZIP file name ("zip_name") of each data tile that would be downloaded is appended.
+    job_list: list or None, default=None
+        If a list is given, the download jobs are appended to it instead of being downloaded, so the jobs of several
+        calls can be downloaded together (see download_zip_files). Not used for orthophotos.
+    Returns
+    -------
+    zip_data_list: list of str
+        A list with the name(s) of of the downloaded file(s).
+    """
+    # the two following variables are used for the naming of the zip files (data kind = dgm, dom or las)
+    data_year = "_" + str(year)
+    data_kind = ""
+    # in this list the names of the zip files are stored
+    zip_data_list = []
+    # in this list the URLs and names of the zip files that have to be downloaded are stored
+    download_jobs = []
+    # the file types that are needed from the zip files of the data tiles
+    member_endings = {"dgm": (".xyz",), "dom": (".xyz",), "las": (".laz",), "ortho": (".tif", ".tfw")}
+    # necessary for the orthophoto lists
+    index = 0
+    # index of the orthophotos that are already present
+    if type_to_download == "ortho" and ortho_index is None:
+        ortho_index = index_orthophotos()
+    downloaded_ortho_keys = []
+    # for loop to download more than one file
+    for i in data_list_to_download:
+        # set the url, the one or two of the variables  used for the naming of the zip files and
+        # get the name of the zip file content and its hypothetically file path
+        # to be able to check if the file is  already present
+        url = ""
+        hy_file_path = """elevation_data/{}/{}/""".format(type_to_download, str(year))
+        file_name = ""
+        file_name_part_1 = ""
+        file_name_part_2 = ""
+        if type_to_download == "meta_data" or type_to_download == "auxiliary_data":
+            data_year = ""
+            if i == "url_id_data":
+                url = "https://raw.githubusercontent.com/Jon-Fr/Geo_419b/main/url_id_file.zip"
+                file_name = "url_id_file.csv"
+            else:
+                url = """https://geoportal.geoportal-th.de/hoehendaten/Uebersichten/Stand_{}.zip""".format(url_year)
+            if type_to_download == "auxiliary_data":
+                hy_file_path = """image_data/{}/""".format(type_to_download)
+            else:
+                hy_file_path = """elevation_data/{}/""".format(type_to_download)
+            if url_year == "2010-2013":
+                file_name = "DGM2_2010-2013_Erfass-lt-Meta_UTM32-UTM_2014-12-10.shp"
+            elif url_year == "2014-2019":
+                file_name = "DGM1_2014-2019_Erfass-lt-Meta_UTM_2020-04-20--17127.shp"
+            elif url_year == "2020-2025":
+                file_name = "DGM1_2020-2025_Erfass-lt-Meta_UTM_2021-03--17127"
+        if type_to_download == "dgm":
+            url = """https://geoportal.geoportal-th.de/hoehendaten/DGM/dgm_{}/dgm{}_{}_1_th_{}.zip""" \
+                .format(url_year, dem_n, i, url_year)
+            data_kind = "dgm_"
+            file_name = url[len(url) - 32:len(url) - 3] + "xyz"
+            if year >= 2020 or additional_check_2019 is True:
+                file_name = url[len(url) - 35:len(url) - 3] + "xyz"
+        if type_to_download == "dom":
+            url = """http://geoportal.geoportal-th.de/hoehendaten/DOM/dom_{}/dom{}_{}_1_th_{}.zip""" \
+                .format(url_year, dem_n, i, url_year)
+            data_kind = "dom_"
+            file_name = url[len(url) - 32:len(url) - 3] + "xyz"
+            if year >= 2020 or additional_check_2019 is True:
+                file_name = url[len(url) - 35:len(url) - 3] + "xyz"
+        if type_to_download == "las":
+            url = """http://geoportal.geoportal-th.de/hoehendaten/LAS/las_{}/las_{}_1_th_{}.zip""" \
+                .format(url_year, i, url_year)
+            data_kind = "las_"
+            file_name = url[len(url) - 32:len(url) - 3] + "laz"
+            if year >= 2020 or additional_check_2019 is True:
+                file_name = url[len(url) - 35:len(url) - 3] + "laz"
+        if type_to_download == "ortho":
+            data_year = ""
+            i = str(i)
+            url = """https://geoportal.geoportal-th.de/gaialight-th/_apps/dladownload/download.php?type=op&id={}""" \
+                .format(i)
+            hy_file_path = """image_data/orthophotos/{}""".format(str(year_list[index]))
+            file_name_part_1 = tile_number_list[index]
+            file_name_part_2 = str(year_list[index])
+        # set the name of the zip file
+        zip_name = data_kind + i + data_year + ".zip"
+        tile_year = year
+        if type_to_download == "ortho":
+            zip_name = "orthophoto_" + tile_number_list[index] + "_" + str(year_list[index]) + ".zip"
+            tile_year = int(year_list[index])
+            index = index + 1
+        # append the zip file name to zip file name list
+        zip_data_list.append(zip_name[0:len(zip_name) - 4])
+        # check the manifest if the data tile is already present
+        conditional_headers = None
+        if manifest is not None and type_to_download in member_endings:
+            # a planned download must not link any files into the working directory
+            if manifest.provide(url=url, folder_path=hy_file_path, link=plan is None) is True:
+                # without ETag or Last-Modified header it is not possible to check if the data tile has changed
+                conditional_headers = manifest.conditional_headers(url=url)
+                if refresh is False or len(conditional_headers) == 0:
+                    continue
+        # download the zip data file if there is no file with the name that it would get and
+        # if the content of the zip file is not already present
+        if conditional_headers is not None or not os.path.exists(zip_name) and \
+                (not os.path.exists(hy_file_path + file_name) or type_to_download == "ortho"):
+            # extra check for orthophotos (necessary because the full filename is harder to predict/construct)
+            if type_to_download == "ortho":
+                ortho_key = (file_name_part_1, int(file_name_part_2))
+                if conditional_headers is None and ortho_key in ortho_index:
+                    continue
+            # only plan the download
+            if plan is not None:
+                plan.append({"type": type_to_download, "year": tile_year, "url": url, "zip_name": zip_name})
+                continue
+            if type_to_download == "ortho":
+                downloaded_ortho_keys.append(ortho_key)
+            # add the file to the download jobs
+            job = {"url": url, "zip_name": zip_name, "headers": conditional_headers}
+            if extract is True and type_to_download in member_endings:
+                job["extract_folder"] = hy_file_path
+                job["member_endings"] = member_endings[type_to_download]
+            download_jobs.append(job)
+    # download the zip files (concurrently if more than one worker is used) or pass the jobs to the caller
+    if job_list is not None and type_to_download != "ortho":
+        job_list.extend(download_jobs)
+    else:
+        download_zip_files(download_jobs=download_jobs, workers=workers, manifest=manifest)
+    # add the downloaded orthophotos to the index
+    for ortho_key in downloaded_ortho_keys:
+        ortho_index.setdefault(ortho_key, [])
+    # return the zip file name list if it is not empty
+    if len(zip_data_list) > 0:
+        return zip_data_list
+    else:
+        return "no_new_data"
+
+
+def create_download_report(plan, number_of_requests=100, bandwidth_mbit=100):
+    """
+    Requests the size of every data tile of a download plan (concurrent head requests, nothing is downloaded) and
+    prints the number of data tiles, the total size and the estimated download time per type and year.
+
+    Parameters
+    ----------
+    plan: list of dict
+        The download plan created by data_download.
+    number_of_requests: int, default=100
+        Maximum number of concurrent head requests.
+    bandwidth_mbit: int or float, default=100
+        Available bandwidth in Mbit/s, used to estimate the download time.
+
+    Returns
+    -------
+    plan_df: pandas.core.frame.DataFrame
+        The download plan with the type, year, URL, ZIP file name and size (in bytes) of each data tile as columns.
+    """
+    plan_df = pandas.DataFrame(plan, columns=["type", "year", "url", "zip_name"])
+    # like the download, each ZIP file is only counted once
+    plan_df = plan_df.drop_duplicates(subset=["zip_name"], ignore_index=True)
+    content_lengths = _aux.get_content_lengths(url_list=list(plan_df["url"].unique()),
+                                               number_of_requests=number_of_requests)
+    plan_df["size"] = plan_df["url"].map(content_lengths)
+    if len(plan_df) == 0:
+        print("There is no data to download.")
+        return plan_df
+    # summarize the plan per type and year
+    summary = plan_df.groupby(["type", "year"]).agg(tiles=("url", "count"),
+                                                    unknown_size=("size", lambda x: x.isna().sum()),
+                                                    size_mb=("size", lambda x: x.sum() / 1e6))
+    print(summary.to_string())
+    total_size = plan_df["size"].sum()
+    print("Data tiles: " + str(len(plan_df)) + ", of which the size is unknown for " +
+          str(int(plan_df["size"].isna().sum())) + ".")
+    print("Total size: " + str(round(total_size / 1e9, 2)) + " GB, estimated download time: " +
+          str(round(total_size * 8 / (bandwidth_mbit * 1e6) / 60, 1)) + " min (at " + str(bandwidth_mbit) +
+          " Mbit/s).")
+    return plan_df
+
+
+def index_orthophotos(folder_path="image_data/orthophotos"):
+    """
+    Creates an index of the orthophotos that are already present. The orthophotos are stored in one folder per year
+    and the index maps each (tile number, year) to the names of the files that contain the tile number and the year.
+
+    Parameters
+    ----------
+    folder_path: str, default=image_data/orthophotos
+        Path to the folder with the year folders of the orthophotos.
+
+    Returns
+    -------
+    ortho_index: dict of {(str, int): list of str}
+        The index of the orthophotos.
+    """
+    ortho_index = {}
+    if not os.path.exists(folder_path):
+        return ortho_index
+    # the tile numbers can overlap with other digits in the filename, therefore a lookahead is used
+    tile_number_pattern = re.compile(r"(?=(\d{3}_\d{4}))")
+    for year_folder in os.listdir(folder_path):
+        if not year_folder.isdigit() or not os.path.isdir(folder_path + "/" + year_folder):
+            continue
+        for file in os.listdir(folder_path + "/" + year_folder):
+            if year_folder not in file:
+                continue
+            for tile_number in set(tile_number_pattern.findall(file)):
+                ortho_index.setdefault((tile_number, int(year_folder)), []).append(file)
+    return ortho_index
+
+
+def download_zip_file(session, url, zip_name, extract_folder=None, member_endings=None, headers=None, manifest=None,
+                      chunk_size=1024 * 1024, retry_policy=None, breaker=None, host_limiter=None, timeout=60):
+    """
+    Downloads a single ZIP file and writes it to the working directory. If an extract folder is given, the relevant
+    content of the ZIP file is extracted into it right after the download and the ZIP file is deleted.
+    The data is first written to a temporary file (zip_name + ".part"). If the download is interrupted, it is resumed
+    from the last received byte with an HTTP range request, so that already downloaded data is not requested again.
+    Failed attempts are retried after a jittered exponential backoff and reported to the circuit breaker.
+    Only a complete file is renamed to zip_name. If a manifest is given, the size, ETag, Last-Modified header, hash
+    and extracted files of the ZIP file are recorded in it.
+
+    Parameters
+    ----------
+    session: requests.Session
+        The session whose connection pool is used for the request.
+    url: str
+        The URL of the ZIP file.
+    zip_name: str
+        The name under which the ZIP file is stored.
+    extract_folder: str or None, default=None
+        Path to the folder into which the content of the ZIP file should be extracted.
+    member_endings: tuple of str or None, default=None
+        File extensions of the files to extract, if None all files are extracted.
+    headers: dict or None, default=None
+        Conditional request headers (If-None-Match / If-Modified-Since), the file is not downloaded if the server
+        answers that it has not been modified.
+    manifest: TileManifest or None, default=None
+        The manifest in which the file is recorded.
+    chunk_size: int, default=1048576
+        Size of the chunks (in bytes) in which the file is downloaded and written.
+    retry_policy: _aux.RetryPolicy or None, default=None
+        The retry policy for interrupted or failed downloads, if None the default policy is used.
+    breaker: _aux.CircuitBreaker or None, default=None
+        The circuit breaker shared by all downloads.
+    host_limiter: _aux.HostLimiter or None, default=None
+        Limits the number of concurrent downloads per host.
+    timeout: int or float, default=60
+        Time (in seconds) to wait for the server to send data before giving up.
+
+    Returns
+    -------
+    """
+    if retry_policy is None:
+        retry_policy = _aux.RetryPolicy()
+    if host_limiter is None:
+        host_slot = contextlib.nullcontext
+    else:
+        host_slot = host_limiter.slot
+    part_name = zip_name + ".part"
+    attempt = 0
+    # ETag and Last-Modified header of the responses with data (200 / 206), None if there was no such response
+    validators = None
+    while True:
+        # wait while the circuit is open
+        if breaker is not None:
+            time.sleep(breaker.wait_time())
+        # continue with the last received byte if there is a partial file
+        position = 0
+        if os.path.exists(part_name):
+            position = os.path.getsize(part_name)
+        request_headers = {}
+        if position > 0:
+            request_headers["Range"] = "bytes={}-".format(position)
+        elif headers is not None:
+            request_headers.update(headers)
+        try:
+            with host_slot(url):
+                response = session.get(url, stream=True, headers=request_headers, timeout=timeout)
+                # the response is closed in any case, so its connection is returned to the pool
+                try:
+                    # the file has not changed since it was recorded in the manifest
+                    if response.status_code == 304:
+                        if breaker is not None:
+                            breaker.record(True)
+                        return
+                    # the partial file could already contain the whole file
+                    if response.status_code == 416:
+                        total_size = get_total_size(response)
+                        if total_size is not None and total_size == position:
+                            break
+                        # the partial file is not usable
+                        os.remove(part_name)
+                        raise IOError("The partial file of " + zip_name + " does not match the file on the server.")
+                    response.raise_for_status()
+                    if validators is None:
+                        validators = {}
+                    for header in ["ETag", "Last-Modified"]:
+                        if response.headers.get(header) is not None:
+                            validators[header] = response.headers.get(header)
+                    # the server ignored the range request and sends the whole file
+                    if response.status_code != 206:
+                        position = 0
+                    total_size = get_total_size(response)
+                    # download and write data (downloading the data file in chunks is useful to save ram)
+                    with open(part_name, "ab" if position > 0 else "wb") as data:
+                        for chunk in response.iter_content(chunk_size=chunk_size):
+                            data.write(chunk)
+                finally:
+                    response.close()
+            # check if the file is complete
+            if total_size is not None and os.path.getsize(part_name) != total_size:
+                raise IOError("The download of " + zip_name + " is incomplete.")
+            if breaker is not None:
+                breaker.record(True)
+            break
+        except (requests.exceptions.RequestException, IOError) as error:
+            # client errors (e.g. 404) are not temporary
+            if isinstance(error, requests.exceptions.HTTPError) and error.response is not None and \
+                    not _aux.is_retryable_status(error.response.status_code):
+                raise
+            if breaker is not None:
+                breaker.record(False)
+            if attempt >= retry_policy.retries:
+                raise
+            time.sleep(retry_policy.delay(attempt))
+            attempt = attempt + 1
+    # the file is complete and gets its final name
+    os.replace(part_name, zip_name)
+    if manifest is not None:
+        # the partial file was already complete, so there was no response with data and its headers are requested
+        if validators is None:
+            validators = {}
+            try:
+                with host_slot(url):
+                    head = session.head(url, allow_redirects=True, timeout=timeout)
+                    head.close()
+                validators = {header: head.headers.get(header) for header in ["ETag", "Last-Modified"]}
+            except requests.exceptions.RequestException:
+                pass
+        manifest.record_download(url=url, zip_name=zip_name, size=os.path.getsize(zip_name),
+                                 etag=validators.get("ETag"), last_modified=validators.get("Last-Modified"),
+                                 sha256=get_file_hash(zip_name))
+    # extract the relevant content and delete the zip file
+    if extract_folder is not None:
+        extracted_paths = extract_zip_file(zip_file=zip_name, folder_path=extract_folder,
+                                           member_endings=member_endings)
+        os.remove(zip_name)
+        if manifest is not None:
+            manifest.record_extraction(zip_name=zip_name, extracted_paths=extracted_paths)
+
+
+def get_total_size(response):
+    """
+    Returns the size (in bytes) of the whole file that is requested. The size is taken from the Content-Range header
+    if there is one and otherwise from the Content-Length header. If the size is unknown None is returned.
+
+    Parameters
+    ----------
+    response: requests.Response
+        The response of the server.
+
+    Returns
+    -------
+    total_size: int or None
+        The size of the whole file.
+    """
+    content_range = response.headers.get("Content-Range")
+    if content_range is not None:
+        # e.g. "bytes 100-199/200" or "bytes */200"
+        total = content_range.split("/")[-1]
+        if total.isdigit():
+            return int(total)
+        return None
+    if response.status_code == 416:
+        return None
+    content_length = response.headers.get("Content-Length")
+    # the length of encoded content does not match the length of the written data
+    if content_length is not None and content_length.isdigit() and "Content-Encoding" not in response.headers:
+        return int(content_length)
+    return None
+
+
+def get_file_hash(file_path, chunk_size=1024 * 1024):
+    """
+    Calculates the SHA-256 hash of a file.
+
+    Parameters
+    ----------
+    file_path: str
+        Path to the file.
+    chunk_size: int, default=1048576
+        Size of the chunks (in bytes) in which the file is read.
+
+    Returns
+    -------
+    hex_digest: str
+        The hash as hexadecimal string.
+    """
+    file_hash = hashlib.sha256()
+    with open(file_path, "rb") as data:
+        for chunk in iter(lambda: data.read(chunk_size), b""):
+            file_hash.update(chunk)
+    return file_hash.hexdigest()
+
+
+def download_zip_files(download_jobs, workers=4, manifest=None, retry_policy=None, max_per_host=8):
+    """
+    Downloads a list of ZIP files. If more than one worker is used, the files are downloaded concurrently. All
+    requests share one session so that the keep-alive connections to the server are reused. The downloads also share
+    a circuit breaker that pauses them if too many requests fail and a limit of concurrent requests per host.
+    Jobs with the name of a ZIP file of an earlier job (e.g. the same tile in two overlapping collection periods) are
+    skipped, so no two downloads write into the same file.
+
+    Parameters
+    ----------
+    download_jobs: list of dict
+        A list of dict of {str: str} which contains the URL ("url") and the name ("zip_name") of each ZIP file and
+        optionally the folder ("extract_folder") and the file extensions ("member_endings") for the extraction as
+        well as conditional request headers ("headers").
+    workers: int, default=4
+        Number of concurrent downloads.
+    manifest: TileManifest or None, default=None
+        The manifest in which the downloaded files are recorded.
+    retry_policy: _aux.RetryPolicy or None, default=None
+        The retry policy for interrupted or failed downloads, if None the default policy is used.
+    max_per_host: int, default=8
+        Maximum number of concurrent downloads per host.
+
+    Returns
+    -------
+    """
+    # keep only the first job of each ZIP file
+    zip_names = set()
+    unique_jobs = []
+    for job in download_jobs:
+        if job["zip_name"] not in zip_names:
+            zip_names.add(job["zip_name"])
+            unique_jobs.append(job)
+    download_jobs = unique_jobs
+    if len(download_jobs) == 0:
+        return
+    breaker = _aux.CircuitBreaker()
+    host_limiter = _aux.HostLimiter(max_per_host=max_per_host)
+    workers = max(1, min(workers, len(download_jobs)))
+    # create a session with a connection pool that is large enough for all workers
+    session = requests.Session()
+    adapter = requests.adapters.HTTPAdapter(pool_connections=workers, pool_maxsize=workers)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    try:
+        if workers == 1:
+            for job in download_jobs:
+                download_zip_file(session=session, manifest=manifest, retry_policy=retry_policy, breaker=breaker,
+                                  host_limiter=host_limiter, **job)
+        else:
+            with concurrent.futures.ThreadPoolExecutor(max_workers=workers) as executor:
+                futures = [executor.submit(download_zip_file, session, manifest=manifest, retry_policy=retry_policy,
+                                           breaker=breaker, host_limiter=host_limiter, **job)
+                           for job in download_jobs]
+                # wait for all downloads and raise the first error that occurred
+                for future in futures:
+                    future.result()
+    finally:
+        session.close()
+
+
+def create_and_unzip(folder_path, zip_files, manifest=None):
+    """
+    Creates a folder (if it is not already existing) and unzip a list of ZIP files into it.
+    Before the function tries to unpacks a file, it checks whether this file actually exists in the working directory.
+    If a manifest is given, the extracted files are recorded in it.
+
+    Parameters
+    ----------
+    folder_path: str
+        Path to / name of the folder to create.
+    zip_files: list of str
+        A list containing the names of the ZIP files to be unzipped.
+    manifest: TileManifest or None, default=None
+        The manifest in which the extracted files are recorded.
+
+    Returns
+    -------
+    """
+    # create folder
+    if not os.path.exists(folder_path):
+        os.makedirs(folder_path)
+    # loop through the list
+    for zip_file in zip_files:
+        # add .zip if necessary
+        if ".zip" not in zip_file:
+            zip_file = zip_file + ".zip"
+        # check if file exist before trying to unzip it
+        if os.path.exists(zip_file):
+            # unzip the file
+            extracted_paths = extract_zip_file(zip_file=zip_file, folder_path=folder_path)
+            if manifest is not None:
+                manifest.record_extraction(zip_name=zip_file, extracted_paths=extracted_paths)
+
+
+def extract_zip_file(zip_file, folder_path, member_endings=None):
+    """
+    Extracts the content of a ZIP file into a folder. If file extensions are given, only the files with one of these
+    extensions are extracted.
+
+    Parameters
+    ----------
+    zip_file: str
+        Path to / name of the ZIP file.
+    folder_path: str
+        Path to the folder into which the content is extracted.
+    member_endings: tuple of str or None, default=None
+        File extensions of the files to extract, if None all files are extracted.
+
+    Returns
+    -------
+    extracted_paths: list of str
+        The absolute paths of the extracted files.
+    """
+    extracted_paths = []
+    # the folder is created here, because concurrent downloads can extract into the same new folder and the check of
+    # ZipFile.extract whether the folder exists is not atomic
+    os.makedirs(folder_path, exist_ok=True)
+    with zipfile.ZipFile(zip_file, "r") as zipped_data:
+        for member in zipped_data.infolist():
+            # only extract the relevant files
+            if member.is_dir() or member_endings is not None and \
+                    not member.filename.lower().endswith(member_endings):
+                continue
+            extracted_paths.append(os.path.abspath(zipped_data.extract(member, path=folder_path)))
+    return extracted_paths
+
+
+class TileManifest:
+    """
+    class to represent a persistent manifest (SQLite database) of the downloaded data tiles. For each data tile the
+    URL, the name and size of the ZIP file, the ETag and Last-Modified header, the SHA-256 hash and the absolute paths
+    of the extracted files are recorded. Because the paths are absolute, one manifest can be shared by several working
+    directories.
+
+    Attributes
+    ----------
+    path: str
+        absolute path of the database file
+    connection: sqlite3.Connection
+        connection to the database
+    lock: threading.Lock
+        lock that serializes the access of concurrent downloads
+    """
+    def __init__(self, path="tile_manifest.sqlite", read_only=False):
+        """
+        Construct all necessary attributes for the objects and create the table if it does not exist.
+        path: str, default=tile_manifest.sqlite
+            path of the database file
+        read_only: bool, default=False
+            open an existing database only for reading (e.g. for a dry run), nothing can be recorded
+        """
+        self.path = os.path.abspath(path)
+        self.lock = threading.Lock()
+        if read_only is True:
+            self.connection = sqlite3.connect(pathlib.Path(self.path).as_uri() + "?mode=ro", uri=True,
+                                              check_same_thread=False)
+            return
+        self.connection = sqlite3.connect(self.path, check_same_thread=False)
+        with self.lock:
+            self.connection.execute("CREATE TABLE IF NOT EXISTS tiles (url TEXT PRIMARY KEY, zip_name TEXT, "
+                                    "size INTEGER, etag TEXT, last_modified TEXT, sha256 TEXT, "
+                                    "extracted_paths TEXT, recorded REAL)")
+            self.connection.execute("CREATE INDEX IF NOT EXISTS tiles_zip_name ON tiles (zip_name)")
+            self.connection.commit()
+
+    def get(self, url):
+        """
+        returns the record of a data tile
+
+        Parameters
+        ----------
+        url: str
+            URL of the data tile
+
+        Returns
+        -------
+        record: dict or None
+            the record of the data tile or None if the data tile is not recorded
+        """
+        with self.lock:
+            row = self.connection.execute("SELECT url, zip_name, size, etag, last_modified, sha256, extracted_paths "
+                                          "FROM tiles WHERE url = ?", (url,)).fetchone()
+        if row is None:
+            return None
+        keys = ["url", "zip_name", "size", "etag", "last_modified", "sha256", "extracted_paths"]
+        record = dict(zip(keys, row))
+        record["extracted_paths"] = json.loads(record["extracted_paths"] or "[]")
+        return record
+
+    def record_download(self, url, zip_name, size, etag, last_modified, sha256):
+        """
+        records a downloaded ZIP file, the extracted files of an earlier download are reset
+
+        Parameters
+        ----------
+        url: str
+            URL of the data tile
+        zip_name: str
+            name of the ZIP file
+        size: int
+            size of the ZIP file in bytes
+        etag: str or None
+            ETag header of the response
+        last_modified: str or None
+            Last-Modified header of the response
+        sha256: str
+            SHA-256 hash of the ZIP file
+
+        Returns
+        -------
+        """
+        with self.lock:
+            self.connection.execute("INSERT OR REPLACE INTO tiles VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                                    (url, zip_name, size, etag, last_modified, sha256, "[]", time.time()))
+            self.connection.commit()
+
+    def record_extraction(self, zip_name, extracted_paths):
+        """
+        records the files that were extracted from a ZIP file
+
+        Parameters
+        ----------
+        zip_name: str
+            name of the ZIP file (with or without .zip)
+        extracted_paths: list of str
+            absolute paths of the extracted files
+
+        Returns
+        -------
+        """
+        if not zip_name.endswith(".zip"):
+            zip_name = zip_name + ".zip"
+        with self.lock:
+            self.connection.execute("UPDATE tiles SET extracted_paths = ?, recorded = ? WHERE zip_name = ?",
+                                    (json.dumps(extracted_paths), time.time(), zip_name))
+            self.connection.commit()
+
+    def provide(self, url, folder_path, link=True):
+        """
+        checks if the extracted files of a data tile are present. Files that were extracted into another folder
+        (e.g. of another working directory) are linked or copied into the folder.
+
+        Parameters
+        ----------
+        url: str
+            URL of the data tile
+        folder_path: str
+            folder in which the extracted files are needed
+        link: bool, default=True
+            Should the files be linked or copied into the folder. If False, it is only checked if they are present.
+
+        Returns
+        -------
+        bool
+            True if the extracted files are present in the folder
+        """
+        record = self.get(url)
+        if record is None or len(record["extracted_paths"]) == 0:
+            return False
+        for path in record["extracted_paths"]:
+            if not os.path.exists(path):
+                return False
+        if link is False:
+            return True
+        folder_path = os.path.abspath(folder_path)
+        for path in record["extracted_paths"]:
+            if os.path.dirname(path) != folder_path:
+                target = os.path.join(folder_path, os.path.basename(path))
+                if not os.path.exists(target):
+                    os.makedirs(folder_path, exist_ok=True)
+                    link_or_copy(path, target)
+        return True
+
+    def conditional_headers(self, url):
+        """
+        returns the headers for a conditional request of a recorded data tile
+
+        Parameters
+        ----------
+        url: str
+            URL of the data tile
+
+        Returns
+        -------
+        headers: dict
+            If-None-Match and / or If-Modified-Since header
+        """
+        headers = {}
+        record = self.get(url)
+        if record is not None:
+            if record["etag"] is not None:
+                headers["If-None-Match"] = record["etag"]
+            if record["last_modified"] is not None:
+                headers["If-Modified-Since"] = record["last_modified"]
+        return headers
+
+    def close(self):
+        """
+        closes the connection to the database
+
+        Returns
+        -------
+        """
+        with self.lock:
+            self.connection.close()
+
+
+def link_or_copy(source, target):
+    """
+    Creates a hard link of a file or copies the file if a link is not possible (e.g. on another drive).
+
+    Parameters
+    ----------
+    source: str
+        path of the file
+    target: str
+        path of the link / copy
+
+    Returns
+    -------
+    """
+    try:
+        os.link(source, target)
+    except OSError:
+        shutil.copy2(source, target)
+
+
+class MetaDataCache:
+    """
+    class to represent a cache of the meta data shapefiles and of their intersections with areas of interest. The
+    entries are keyed by the path and the modification time of the shapefile, so a shapefile is read only once per
+    run and again only if it was extracted again. The entries are additionally stored as GeoParquet files in the cache
+    folder, which can be read much faster than the shapefiles in the next run. Storing them requires the optional
+    package pyarrow, if it is not installed only the in-process cache is used.
+
+    Attributes
+    ----------
+    folder: str or None
+        path of the cache folder, if None the entries are not stored
+    read_only: bool
+        if True, stored entries are loaded, but no entries are stored and the cache folder is not created
+    geodfs: dict
+        the meta data geodataframes and their tile grids
+    intersections: dict
+        the intersections with the areas of interest
+    """
+    def __init__(self, folder="meta_data_cache", read_only=False):
+        """
+        Construct all necessary attributes for the objects.
+        folder: str or None, default=meta_data_cache
+            path of the cache folder, if None the entries are not stored
+        read_only: bool, default=False
+            if True, stored entries are loaded, but no entries are stored and the cache folder is not created
+        """
+        self.folder = folder
+        self.read_only = read_only
+        self.geodfs = dict()
+        self.intersections = dict()
+        if self.folder is not None and self.read_only is False:
+            os.makedirs(self.folder, exist_ok=True)
+
+    def get_key(self, path):
+        """
+        returns the key of a shapefile (name, modification time and size), links and copies of a shapefile that keep
+        the modification time (see link_or_copy) share the key
+
+        Parameters
+        ----------
+        path: str
+            path of the shapefile
+
+        Returns
+        -------
+        key: str
+            the key
+        """
+        stat = os.stat(path)
+        path_hash = hashlib.sha1("{}|{}|{}".format(os.path.basename(path), stat.st_mtime_ns,
+                                                   stat.st_size).encode()).hexdigest()
+        return os.path.splitext(os.path.basename(path))[0] + "_" + path_hash[:16]
+
+    def read(self, path):
+        """
+        returns the geodataframe and the tile grid of a shapefile
+
+        Parameters
+        ----------
+        path: str
+            path of the shapefile
+
+        Returns
+        -------
+        geodf: geopandas.geodataframe.GeoDataFrame
+            the geodataframe
+        tile_grid: dict or None
+            the tile grid (see create_tile_grid)
+        """
+        key = self.get_key(path)
+        if key not in self.geodfs:
+            geodf = self.load(key)
+            if geodf is None:
+                geodf = geopandas.read_file(path)
+                self.store(key, geodf)
+            self.geodfs[key] = (geodf, create_tile_grid(geodf=geodf))
+        return self.geodfs[key]
+
+    def intersect(self, aoi, path):
+        """
+        returns the intersection of an area of interest and a shapefile (see intersect_geodfs), if the shapefile has a
+        date of capture (ERFASSUNG) it is parsed into the column ERFASSUNG_PERIOD
+
+        Parameters
+        ----------
+        aoi: geopandas.geodataframe.GeoDataFrame
+            the area of interest
+        path: str
+            path of the shapefile
+
+        Returns
+        -------
+        intersected_geodf: geopandas.geodataframe.GeoDataFrame
+            intersected geodataframe
+        """
+        # the area of interest is identified by its geometries and its crs
+        aoi_hash = hashlib.sha1(str(aoi.crs).encode())
+        for geometry in aoi.geometry:
+            if geometry is not None:
+                aoi_hash.update(geometry.wkb)
+        key = self.get_key(path) + "_aoi_" + aoi_hash.hexdigest()[:16]
+        if key not in self.intersections:
+            intersected_geodf = self.load(key)
+            if intersected_geodf is None:
+                geodf, tile_grid = self.read(path)
+                intersected_geodf = intersect_geodfs(geodf_1=aoi, geodf_2=geodf, tile_grid=tile_grid)
+                # parse the date of capture once (see create_elev_download_lists)
+                if "ERFASSUNG" in intersected_geodf.columns:
+                    intersected_geodf = intersected_geodf.assign(
+                        ERFASSUNG_PERIOD=parse_erfassung(intersected_geodf["ERFASSUNG"]))
+                self.store(key, intersected_geodf)
+            self.intersections[key] = intersected_geodf
+        return self.intersections[key]
+
+    def load(self, key):
+        """
+        loads a stored entry, returns None if it is not stored
+
+        Parameters
+        ----------
+        key: str
+            key of the entry
+
+        Returns
+        -------
+        geodf: geopandas.geodataframe.GeoDataFrame or None
+            the geodataframe
+        """
+        if self.folder is None or not os.path.exists(os.path.join(self.folder, key + ".parquet")):
+            return None
+        try:
+            return geopandas.read_parquet(os.path.join(self.folder, key + ".parquet"))
+        except ImportError:
+            return None
+
+    def store(self, key, geodf):
+        """
+        stores an entry and removes the entries of older versions of the shapefile, if pyarrow is not installed the
+        cache folder is no longer used
+
+        Parameters
+        ----------
+        key: str
+            key of the entry
+        geodf: geopandas.geodataframe.GeoDataFrame
+            the geodataframe
+
+        Returns
+        -------
+        """
+        if self.folder is None or self.read_only is True:
+            return
+        # write to a temporary file first, so a concurrent run never reads a half written entry
+        file_path = os.path.join(self.folder, key + ".parquet")
+        try:
+            geodf.to_parquet(file_path + ".tmp")
+        except ImportError:
+            print("pyarrow is not installed, the meta data is cached only for this run.")
+            self.folder = None
+            return
+        os.replace(file_path + ".tmp", file_path)
+        # remove the entries of older versions of the shapefile
+        if "_aoi_" not in key:
+            pattern = re.compile(re.escape(key[:-17]) + r"_[0-9a-f]{16}(_aoi_[0-9a-f]{16})?\.parquet")
+            for file_name in os.listdir(self.folder):
+                if pattern.fullmatch(file_name) and not file_name.startswith(key):
+                    os.remove(os.path.join(self.folder, file_name))
+
+
+def intersect_geodfs(geodf_1, geodf_2, tile_grid=None):
+    """
+    Intersects two geodataframes and returns the features of the second geodataframe that intersect the first one. If
+    the coordinate reference system (crs) of the geodataframes is different the first geodataframe is re-projected to
+    the crs of the second geodataframe. Because the data tiles form a regular grid, the candidate features are
+    computed from the bounds of the first geodataframe with the tile grid and only the candidates are intersected
+    exactly. If the second geodataframe does not form a grid, the candidates are queried with its spatial index.
+
+    Parameters
+    ----------
+    geodf_1: geopandas.geodataframe.GeoDataFrame
+        geodataframe 1 (e.g. the area of interest)
+    geodf_2: geopandas.geodataframe.GeoDataFrame
+        geodataframe 2 (e.g. the meta data)
+    tile_grid: dict or None, default=None
+        Tile grid of geodataframe 2 (see create_tile_grid), if None it is created.
+
+    Returns
+    -------
+    intersected_geodf: geopandas.geodataframe.GeoDataFrame
+        intersected geodataframe
+    """
+    # re-project geodf_1 if necessary
+    re = geodf_2.crs == geodf_1.crs
+    if re is False:
+        geodf_1 = geodf_1.to_crs(geodf_2.crs)
+    geometry = geodf_1.unary_union
+    if tile_grid is None:
+        tile_grid = create_tile_grid(geodf=geodf_2)
+    # get the candidates from the tile grid or (if the features do not form a grid) from the spatial index
+    if tile_grid is not None:
+        tile_size = tile_grid["tile_size"]
+        cell_keys = list()
+        for bounds in geodf_1.bounds.dropna().itertuples(index=False):
+            # all cells that touch the bounds
+            x = numpy.arange(math.ceil(bounds.minx / tile_size) - 1, math.floor(bounds.maxx / tile_size) + 1)
+            y = numpy.arange(math.ceil(bounds.miny / tile_size) - 1, math.floor(bounds.maxy / tile_size) + 1)
+            cell_keys.append((x[:, None] * 100000 + y[None, :]).ravel())
+        cell_keys = numpy.unique(numpy.concatenate(cell_keys)) if cell_keys else numpy.zeros(0, dtype=numpy.int64)
+        # binary search of the cells in the sorted keys of the grid
+        starts = numpy.searchsorted(tile_grid["keys"], cell_keys, side="left")
+        stops = numpy.searchsorted(tile_grid["keys"], cell_keys, side="right")
+        counts = stops - starts
+        positions = numpy.unique(tile_grid["positions"][numpy.repeat(stops - counts.cumsum(), counts) +
+                                                        numpy.arange(counts.sum())])
+    else:
+        positions = sorted(geodf_2.sindex.query(geometry, predicate="intersects"))
+    # execute the exact intersection of the candidates
+    candidates = geodf_2.iloc[positions]
+    intersected_geodf = candidates[candidates.intersects(geometry)]
+    # return the result
+    return intersected_geodf
+
+
+def create_tile_grid(geodf, tile_size=1000, max_cells=4):
+    """
+    Creates and returns a tile grid of a geodataframe, that assigns each cell of a regular grid the positions of the
+    features that cover it. The cells are stored as sorted keys (x * 10 ** 5 + y) with the positions in the same
+    order. If the features do not form a grid (on average more than max_cells cells per feature), None is returned.
+
+    Parameters
+    ----------
+    geodf: geopandas.geodataframe.GeoDataFrame
+        The geodataframe (e.g. the meta data of the data tiles).
+    tile_size: int, default=1000
+        The size of the cells in the unit of the crs (UTM32: meter).
+    max_cells: int, default=4
+        The maximum average number of cells per feature.
+
+    Returns
+    -------
+    tile_grid: dict or None
+        The tile size, the sorted keys of the cells and the positions of the features.
+    """
+    bounds = geodf.bounds.to_numpy()
+    # features without a geometry are not part of the grid
+    valid = numpy.flatnonzero(~numpy.isnan(bounds).any(axis=1))
+    if len(valid) == 0:
+        return None
+    bounds = bounds[valid] / tile_size
+    # cells that are covered by the features (not only touched)
+    min_x = numpy.floor(bounds[:, 0]).astype(numpy.int64)
+    min_y = numpy.floor(bounds[:, 1]).astype(numpy.int64)
+    max_x = numpy.maximum(numpy.ceil(bounds[:, 2]).astype(numpy.int64) - 1, min_x)
+    max_y = numpy.maximum(numpy.ceil(bounds[:, 3]).astype(numpy.int64) - 1, min_y)
+    # one key per feature and covered cell
+    height = max_y - min_y + 1
+    counts = (max_x - min_x + 1) * height
+    if counts.mean() > max_cells:
+        return None
+    positions = numpy.repeat(valid, counts)
+    offsets = numpy.arange(counts.sum()) - numpy.repeat(counts.cumsum() - counts, counts)
+    keys = (numpy.repeat(min_x, counts) + offsets // numpy.repeat(height, counts)) * 100000 + \
+        numpy.repeat(min_y, counts) + offsets % numpy.repeat(height, counts)
+    order = numpy.argsort(keys, kind="stable")
+    tile_grid = {"tile_size": tile_size, "keys": keys[order], "positions": positions[order]}
+    return tile_grid
+
+
+def create_elev_download_lists(elev_aoi, start_year, end_year, month_start_year=1, month_end_year=12,
+                               name_column="NAME"):
+    """
+    Creates and returns the download lists of all years of a period. The tiles are selected with one range query on
+    the date of capture (ERFASSUNG) and grouped by the year of capture.
+
+    Parameters
+    ----------
+    elev_aoi: geopandas.geodataframe.GeoDataFrame
+        The Intersected geodataframe of the area of interest and the metadata geodataframe.
+    start_year: int
+        First year of interest.
+    end_year: int
+        Last year of interest.
+    month_start_year: int, default=1
+        First month of interest (in the first year).
+    month_end_year: int, default=12
+        Last month of interest (in the last year).
+    name_column: str, default=NAME
+        The column with the names of the tiles ("DGM_1X1" for the meta data of 2010-2013).
+
+    Returns
+    -------
+    elev_download_lists: dict
+        The years as keys and the lists of the names of the tiles as values (only years with data).
+    """
+    # use the parsed date of capture if it is already part of the geodataframe
+    if "ERFASSUNG_PERIOD" in elev_aoi.columns:
+        periods = elev_aoi["ERFASSUNG_PERIOD"]
+    else:
+        periods = parse_erfassung(elev_aoi["ERFASSUNG"])
+    # select all months of interest with one range query
+    selected = ((periods >= pandas.Period(year=start_year, month=month_start_year, freq="M")) &
+                (periods <= pandas.Period(year=end_year, month=month_end_year, freq="M"))).to_numpy()
+    names = elev_aoi[name_column][selected].astype(str)
+    # the tile numbers of the meta data of 2010-2013 have a prefix
+    if name_column == "DGM_1X1":
+        names = names.str[2:]
+    # group the tiles by year
+    elev_download_lists = dict()
+    for year, group in names.groupby(periods[selected].dt.year.to_numpy()):
+        elev_download_lists[int(year)] = list(group)
+    return elev_download_lists
+
+
+def parse_erfassung(erfassung):
+    """
+    Parses the dates of capture of the meta data (ERFASSUNG, e.g. 2015-03) and returns them as monthly periods.
+    Invalid dates become NaT.
+
+    Parameters
+    ----------
+    erfassung: pandas.core.series.Series
+        The dates of capture.
+
+    Returns
+    -------
+    periods: pandas.core.series.Series
+        The monthly periods.
+    """
+    periods = pandas.to_datetime(erfassung, format="%Y-%m", errors="coerce").dt.to_period("M")
+    return periods
+
+
+def create_elev_download_plan(aoi, meta_data_cache, start_year, end_year, month_start_year=1, month_end_year=12,
+                              products=("dgm", "dom", "las"), zip_files_to_delete=None):
+    """
+    Resolves all data tiles of the elevation data that are to be downloaded before any data tile is downloaded and
+    returns them as a plan. Because the collection periods of the meta data partly overlap, the meta data of each
+    period is searched for all months of interest that it covers (see ELEVATION_PERIODS). The meta data is downloaded
+    if necessary.
+
+    Parameters
+    ----------
+    aoi: geopandas.geodataframe.GeoDataFrame
+        The area of interest.
+    meta_data_cache: MetaDataCache
+        The cache of the meta data.
+    start_year: int
+        First year of interest.
+    end_year: int
+        Last year of interest.
+    month_start_year: int, default=1
+        First month of interest (in the first year).
+    month_end_year: int, default=12
+        Last month of interest (in the last year).
+    products: iterable of str, default=("dgm", "dom", "las")
+        The types of the elevation data to be downloaded.
+    zip_files_to_delete: list or None, default=None
+        If a list is given, the names of the downloaded meta data ZIP files are appended.
+
+    Returns
+    -------
+    elev_plan: pandas.core.frame.DataFrame
+        The data tiles with the type ("product"), the collection period ("period"), the year ("year") and the tile
+        number ("tile_number") as columns.
+    tile_counts: dict
+        The years as keys and the number of tiles of the area of interest in the meta data of the year as values.
+    """
+    first = pandas.Period(year=start_year, month=month_start_year, freq="M")
+    last = pandas.Period(year=end_year, month=month_end_year, freq="M")
+    plan_dfs = [pandas.DataFrame(columns=["product", "period", "year", "tile_number"])]
+    tile_counts = dict()
+    for url_year, first_month, last_month in ELEVATION_PERIODS:
+        # skip the periods that do not cover a month of interest
+        first_month = max(first, pandas.Period(first_month, freq="M"))
+        last_month = min(last, pandas.Period(last_month, freq="M"))
+        if first_month > last_month:
+            continue
+        url_year, dem_n, elev_meta_file = set_elev_variables(year=int(url_year[-4:]))
+        # download meta data
+        meta_data_name = data_download(data_list_to_download=["meta_data_elevation_data_" + url_year],
+                                       type_to_download="meta_data", url_year=url_year)
+        # unzip meta_data if necessary
+        if meta_data_name != "no_new_data" or os.path.exists("elevation_data/meta_data" + url_year + ".zip"):
+            if zip_files_to_delete is not None:
+                zip_files_to_delete.append("meta_data_elevation_data_" + url_year)
+            create_and_unzip(folder_path="elevation_data/meta_data",
+                             zip_files=["meta_data_elevation_data_" + url_year])
+        # intersect meta data and aoi geodataframe
+        elev_meta_data_aoi = meta_data_cache.intersect(aoi=aoi, path="elevation_data/meta_data/" + elev_meta_file)
+        for year in range(start_year, end_year + 1):
+            if set_elev_variables(year=year)[0] == url_year:
+                tile_counts[year] = len(elev_meta_data_aoi)
+        # get the download lists of all years of the period
+        name_column = "DGM_1X1" if url_year == "2010-2013" else "NAME"
+        elev_download_lists = create_elev_download_lists(elev_aoi=elev_meta_data_aoi, start_year=first_month.year,
+                                                         end_year=last_month.year,
+                                                         month_start_year=first_month.month,
+                                                         month_end_year=last_month.month, name_column=name_column)
+        for year, elev_download_list in elev_download_lists.items():
+            for product in products:
+                plan_dfs.append(pandas.DataFrame({"product": product, "period": url_year, "year": year,
+                                                  "tile_number": elev_download_list}))
+    elev_plan = pandas.concat(plan_dfs, ignore_index=True)
+    # each data tile is downloaded only once
+    elev_plan = elev_plan.drop_duplicates(subset=["product", "period", "tile_number"], ignore_index=True)
+    elev_plan["year"] = elev_plan["year"].astype(int)
+    return elev_plan, tile_counts
+
+
+def report_elev_download_plan(elev_plan, tile_counts, start_year, end_year, month_start_year=1, month_end_year=12):
+    """
+    Informs the user about the years for which there is no elevation data or only elevation data for a part of the
+    area of interest.
+
+    Parameters
+    ----------
+    elev_plan: pandas.core.frame.DataFrame
+        The plan of the data tiles (see create_elev_download_plan).
+    tile_counts: dict
+        The years as keys and the number of tiles of the area of interest in the meta data of the year as values.
+    start_year: int
+        First year of interest.
+    end_year: int
+        Last year of interest.
+    month_start_year: int, default=1
+        First month of interest (in the first year).
+    month_end_year: int, default=12
+        Last month of interest (in the last year).
+
+    Returns
+    -------
+    """
+    if start_year < 2011:
+        print("There is no elevation data available prior to 2011.")
+    if end_year > 2025:
+        print("There is no elevation data available after 2025.")
+    # number of tiles per year (the types of the elevation data share the tiles)
+    available = elev_plan.drop_duplicates(subset=["year", "tile_number"])["year"].value_counts()
+    for year in range(max(start_year, 2011), end_year + 1):
+        if year not in tile_counts:
+            continue
+        if year not in available.index:
+            print("There is no elevation data available for the area for " + str(year) + ".")
+            if year == start_year and month_start_year != 1 or year == end_year and month_end_year != 12:
+                print("At least for the selected months.")
+        elif available[year] < tile_counts[year]:
+            print("Only for a part of the area there is elevation data available for " + str(year) + ".")
+
+
+def delete_zip_files(zip_files):
+    """
+    Deletes one or more ZIP files. Before the function tries to delete a file, it checks whether
+    this file actually exists in the working directory.
+
+    Parameters
+    ----------
+    zip_files: list of str
+        A list containing the names of the ZIP files to be deleted.
+
+    Returns
+    -------
+    """
+    # for loop to cycle through the whole list
+    for i in zip_files:
+        # check if the zip file to delete actually exist
+        if os.path.exists(i + ".zip"):
+            # delete the zip file
+            os.remove(i + ".zip")
+
+
+def c_tile_number_df(geodf):
+    """
+    Creates and returns a dataframe that contains the tile numbers of a geodataframe.
+
+    Parameters
+    ----------
+    geodf: geopandas.geodataframe.GeoDataFrame
+        The Intersected geodataframe of the area of interest and the tile number geodataframe.
+
+    Returns
+    -------
+    df: pandas.core.frame.DataFrame
+         That contains the tile numbers.
+    """
+    # get the relevant tile_numbers
+    tile_number_list = list()
+    temp_list = list(geodf["DGM_1X1"])
+    for tile_number in temp_list:
+        tile_number_list.append(tile_number[2:])
+    # create the df
+    data = {"tile_number": tile_number_list}
+    df = pandas.DataFrame(data)
+    return df
+
+
+class UrlIdIndex:
+    """
+    class to represent a compact binary index of the url id file. The index is a sorted array with one key
+    (easting, northing and year of the tile number) and the url id per orthophoto. It is stored next to the url id
+    file, memory-mapped and searched with a binary search, so the url id file does not have to be loaded to find the
+    url ids of some tile numbers. The index is rebuilt if the url id file is newer.
+
+    Attributes
+    ----------
+    csv_path: str
+        path of the url id file
+    index_path: str
+        path of the index file
+    keys: numpy.ndarray
+        sorted keys (easting * 10 ** 8 + northing * 10 ** 4 + year)
+    url_ids: numpy.ndarray
+        url ids in the order of the keys
+    """
+    def __init__(self, csv_path="image_data/auxiliary_data/url_id_file.csv"):
+        """
+        Construct all necessary attributes for the objects and build the index if necessary.
+        csv_path: str, default=image_data/auxiliary_data/url_id_file.csv
+            path of the url id file
+        """
+        self.csv_path = csv_path
+        self.index_path = os.path.splitext(csv_path)[0] + "_index.npy"
+        # build the index if it does not exist or is older than the url id file
+        if not os.path.exists(self.index_path) or \
+                os.path.getmtime(self.index_path) < os.path.getmtime(self.csv_path):
+            self.build()
+        index = numpy.load(self.index_path, mmap_mode="r")
+        self.keys = index[0]
+        self.url_ids = index[1]
+
+    def build(self):
+        """
+        builds the index from the url id file and writes it to the index file
+
+        Returns
+        -------
+        """
+        url_id_df = pandas.read_csv(self.csv_path, dtype={"tile_number": str})
+        keys = tile_number_keys(url_id_df["tile_number"]) * 10000 + url_id_df["year"].to_numpy(dtype=numpy.int64)
+        order = numpy.argsort(keys, kind="stable")
+        index = numpy.stack([keys[order], url_id_df["url_id"].to_numpy(dtype=numpy.int64)[order]])
+        # write to a temporary file first, so a concurrent run never maps a half written index
+        temp_path = self.index_path + ".tmp"
+        with open(temp_path, "wb") as file:
+            numpy.save(file, index)
+        os.replace(temp_path, self.index_path)
+
+    def lookup(self, tile_numbers, start_year, end_year):
+        """
+        returns the url ids of the orthophotos of the tile numbers for a range of years
+
+        Parameters
+        ----------
+        tile_numbers: list of str
+            The tile numbers (e.g. 650_5650).
+        start_year: int
+            First year of interest.
+        end_year: int
+            Last year of interest.
+
+        Returns
+        -------
+        df: pandas.core.frame.DataFrame
+            Dataframe with the url ids, the years and the tile numbers as columns.
+        """
+        tile_numbers = numpy.asarray(list(tile_numbers), dtype=str)
+        tile_keys = tile_number_keys(tile_numbers) * 10000
+        # binary search of the first and the last key of each tile number in the year range
+        starts = numpy.searchsorted(self.keys, tile_keys + start_year, side="left")
+        stops = numpy.searchsorted(self.keys, tile_keys + end_year, side="right")
+        counts = stops - starts
+        positions = numpy.repeat(stops - counts.cumsum(), counts) + numpy.arange(counts.sum())
+        df = pandas.DataFrame({"url_id": self.url_ids[positions],
+                               "year": self.keys[positions] % 10000,
+                               "tile_number": numpy.repeat(tile_numbers, counts)})
+        return df
+
+
+def tile_number_keys(tile_numbers):
+    """
+    Returns the integer keys (easting * 10 ** 4 + northing) of tile numbers.
+
+    Parameters
+    ----------
+    tile_numbers: array-like of str
+        The tile numbers (e.g. 650_5650).
+
+    Returns
+    -------
+    keys: numpy.ndarray
+        The keys.
+    """
+    parts = pandas.Series(tile_numbers, dtype=str).str.split("_", n=1, expand=True)
+    if len(parts) == 0:
+        return numpy.zeros(0, dtype=numpy.int64)
+    return parts[0].to_numpy(dtype=numpy.int64) * 10000 + parts[1].to_numpy(dtype=numpy.int64)
+
+
+def get_relevant_url_ids(url_id_index, tile_number_df, start_year, end_year):
+    """
+    Creates and returns three list that are needed for the download of the orthophotos and one list contacting the years
+    where orthophotos are available only for a part of the area of interest. To accomplish this, the url ids of the
+    tile numbers are looked up in the url id index. Because before 2019 the orthophotos cover a 2x2 km area, the years
+    before and after 2018 have to be requested separately.
+
+    Parameters
+    ----------
+    url_id_index: UrlIdIndex
+        Index with the the ID part of all URLs, the years and the tile numbers.
+    tile_number_df: pandas.core.frame.DataFrame
+        Dataframe containing all relevant tile numbers.
+    start_year: int
+        First year or interest.
+    end_year:
+        Last year of interest.
+
+    Returns
+    -------
+    url_id_list: list of str
+        A list which contains the ID part of the URL for each orthophoto downloaded.
+    year_list: list of int
+        A list which contains the year of capture of each orthophoto to be downloaded.
+    tile_number_list: list of str
+         A list which contains the tile number of each orthophoto to be downloaded.
+    partly_data_list: list of int
+        A list contacting the years where orthophotos are available only for a part of the area of interest.
+    """
+    # check if the years are before 2019
+    if end_year < 2019 and len(tile_number_df) > 0:
+        # snap odd tile numbers to the even tile numbers of the 2x2 km tiles and remove the duplicates
+        parts = tile_number_df["tile_number"].str.split("_", n=1, expand=True).astype(int)
+        easting = parts[0] - parts[0] % 2
+        northing = parts[1] - parts[1] % 2
+        tile_number_df = pandas.DataFrame({"tile_number": easting.astype(str) + "_" + northing.astype(str)})
+        tile_number_df = tile_number_df.drop_duplicates(ignore_index=True)
+    # look up the url ids of the relevant tile numbers and years
+    filtered_df = url_id_index.lookup(tile_numbers=tile_number_df["tile_number"], start_year=start_year,
+                                      end_year=end_year)
+    # store relevant url_ids acquisition years and tile numbers in lists and return them
+    url_id_list = list(filtered_df["url_id"])
+    year_list = list(filtered_df["year"])
+    tile_number_list = list(filtered_df["tile_number"])
+    # check if there are orthophotos available for the whole aoi for each year (only necessary for years before 2018)
+    # add years where this is not the case to a list and return that list
+    partly_data_list = []
+    if end_year < 2019:
+        for year in range(start_year, end_year + 1):
+            if year < 2018:
+                year_df = filtered_df[(filtered_df["year"] == year)]
+                if len(year_df) < len(tile_number_df) and len(year_df) != 0:
+                    partly_data_list.append(year)
+    return url_id_list, year_list, tile_number_list, partly_data_list
+
+
+class GeoFileHandler:
+    """
+    class to represent a folder with geo-files
+
+    Attributes
+    ----------
+    path: str
+        path of the directory which contains the folder
+    folder_name: str
+        name of the folder
+    geo_file_list: list of dict
+        a list of dict of {str, array[int]} which contains the absolute path and
+        extension [minX, minY, maxX, maxY] of a geo-file
+    file_list: list of str
+        list of absolute paths of all files created from geo_file_list because
+        its needed gdal.BuildVRT() in method create_vrt
+    extension: array of int
+        array with [minX, minY, maxX, maxY] for all files
+    """
+    def __init__(self, path, folder_name, geo_file_list):
+        """
+        Construct all necessary attributes for the objects.
+        Calculates the the extension of all rasters for the raster mosaic
+        path: str
+            path of the directory with the folder
+        folder_name: str
+            name of the folder
+        geo_file_list: list of dict
+            a list of dict of {str, array[int]} which contains the absolute path and
+            extension [minX, minY, maxX, maxY] of a geo-file
+        """
+        self.folder = path + "/" + folder_name
+        self.name = folder_name
+        self.geo_file_list = geo_file_list
+        full_extent = []
+        self.file_list = []
+        for i in range(len(geo_file_list)):
+            self.file_list.append(geo_file_list[i]["file"])
+            # needed for gdal.BuildVRT() in method create_vrt
+            if i == 0:
+                # extent of first raster is full extent temporary
+                full_extent = geo_file_list[i]["extent"]
+            else:
+                for key in [0, 1]:
+                    # if new minimum
+                    if geo_file_list[i]["extent"][key] < full_extent[key]:
+                        full_extent[key] = geo_file_list[i]["extent"][key]
+                for key in [2, 3]:
+                    # if new maximum
+                    if geo_file_list[i]["extent"][key] > full_extent[key]:
+                        full_extent[key] = geo_file_list[i]["extent"][key]
+        self.extent = full_extent
+
+    def create_vrt(self, name, epsg="EPSG: 25832"):
+        """
+        creates a raster-mosaic using gdal.BuildVRT and export as GeoTiff in choosable crs
+
+        Parameters
+        ----------
+        name: str
+            name of the GeoTiff
+        epsg: str, default=EPSG: 25832
+            EPSG-code of chosen crs
+
+        Returns
+        -------
+        """
+        # build vrt
+        opts = gdal.BuildVRTOptions(outputBounds=self.extent)
+        vrt = gdal.BuildVRT(self.folder + "/"+name+".vrt", self.file_list, options=opts)
+        # warp in chosen crs
+        vrt_warped = gdal.Warp("", vrt, dstSRS=epsg, format='vrt')
+        # write as GeoTiff
+        gdal.Translate(self.folder + "/"+name+".tif", vrt_warped, format='GTiff',
+                       creationOptions=['COMPRESS:DEFLATE', 'TILED:YES'])
+
+
+def go_through_all_raster(dir, ending, file_cor=None, workers=1, memory_budget_mb=256):
+    """
+    go through all raster of path including subfolders. Calling the function raster_correction (file_cor given)
+    or create_geo_file_dic (no file_cor given) to get the a dictionary with file end extent. For each subfolder
+    an instance of the class GeoFileHandler is created. All Objects of GeoFileHandler are returned as a list.
+    The raster corrections are independent of each other, so they can be executed by a pool of worker processes.
+    The order of the results does not depend on the number of workers. The correction file is warped only once per
+    cluster of touching raster of a subfolder (see warp_correction).
+    XYZ files are converted once into Cloud Optimized GeoTiffs (see ingest_xyz_tiles), which are used instead.
+
+    Parameters
+    ----------
+    dir: str
+        directory with subfolders, witch contains all raster datasets
+    ending: str
+        file extension of the raster dataset (f.e. .tif)
+    file_cor: str or None, default=None
+        path of a file for raster correction
+    workers: int, default=1
+        number of worker processes for the raster correction (1 means that the rasters are corrected one after
+        another in this process)
+    memory_budget_mb: int or float, default=256
+        memory budget of each raster correction in MB (per worker process)
+
+    Returns
+    -------
+    geo_file_handler_list: list of GeoFileHandler
+        list  with instances of GeoFileHandler for every subfolder
+    """
+    folder_list = os.listdir(dir)
+    # the raster of every subfolder in folder
+    raster_lists = []
+    for i1 in range(len(folder_list)):
+        if ending == ".xyz":
+            raster_lists.append(ingest_xyz_tiles(dir + "/" + folder_list[i1]))
+        else:
+            file_list = os.listdir(dir + "/" + folder_list[i1])
+            raster_lists.append([file for file in file_list if file.endswith(ending)])
+    if ending == ".xyz":
+        ending = "_cog.tif"
+    # warp the correction file once per folder (or per cluster of raster, see warp_correction)
+    warped_cors = [dict() for i1 in range(len(folder_list))]
+    if file_cor is not None:
+        for i1 in range(len(folder_list)):
+            warped_cors[i1] = warp_correction(dir + "/" + folder_list[i1], raster_lists[i1], file_cor)
+    # correct the raster in worker processes if necessary, the results keep the order of the raster
+    corrections = None
+    if file_cor is not None and workers > 1:
+        with concurrent.futures.ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = [[executor.submit(raster_correction, dir + "/" + folder_list[i1], file, file_cor, ending,
+                                        warped_cor=warped_cors[i1].get(file), memory_budget_mb=memory_budget_mb)
+                        for file in raster_lists[i1]] for i1 in range(len(folder_list))]
+            corrections = [[future.result() for future in folder_futures] for folder_futures in futures]
+    geo_file_handler_list = []
+    for i1 in range(len(folder_list)):
+        # loop through every folder in directory
+        out_file_list = []
+        for i2 in range(len(raster_lists[i1])):
+            # loop through every raster in folder
+            if corrections is not None:
+                out_file_list.append(corrections[i1][i2])
+            elif file_cor is not None:
+                out_file_list.append(raster_correction(dir + "/" + folder_list[i1], raster_lists[i1][i2],
+                                                       file_cor, ending,
+                                                       warped_cor=warped_cors[i1].get(raster_lists[i1][i2]),
+                                                       memory_budget_mb=memory_budget_mb))
+            else:
+                out_file_list.append(create_geo_file_dic(dir + "/" + folder_list[i1], raster_lists[i1][i2]))
+        geo_file_handler_list.append(GeoFileHandler(dir, folder_list[i1], out_file_list))
+    return geo_file_handler_list
+
+
+def warp_correction(dir, raster_list, file_cor, epsg="EPSG: 25832", max_area_ratio=4):
+    """
+    warps the correction file once to the crs, resolution and pixel grid of the raster to be corrected, so that the
+    correction of each raster only has to read its window (see raster_correction). The raster are grouped into
+    clusters of touching raster (see cluster_extents) and the correction file is warped once for each cluster. A
+    cluster whose bounding box is more than max_area_ratio times larger than the area of its raster is not warped,
+    its raster are warped one by one in raster_correction instead.
+    The warped correction files are written as tiled GeoTiffs into the folder, their names contain a hash of the path,
+    size and modification time of the correction file (correction_warped_<hash>_<cluster>.tif). Warped correction
+    files of earlier runs are deleted first.
+
+    Parameters
+    ----------
+    dir: str
+        directory
+    raster_list: list of str
+        names of the raster to be corrected
+    file_cor: str
+        path of the correction-raster-file
+    epsg: str, optional, default=EPSG: 25832
+        EPSG-code of the raster
+    max_area_ratio: int or float, default=4
+        maximum ratio of the area of the bounding box of a cluster to the area of its raster
+
+    Returns
+    -------
+    warped_cors: dict
+        dict of {str: str or None} with the name of each raster and the path of its warped correction file (None if
+        the raster is warped on its own)
+    """
+    warped_cors = {file: None for file in raster_list}
+    if len(raster_list) == 0:
+        return warped_cors
+    # extension [minX, minY, maxX, maxY] and resolution of the raster
+    extents = []
+    for file in raster_list:
+        gt, x_size, y_size = get_raster_grid(dir + "/" + file)
+        extents.append([gt[0], gt[3] + gt[5] * y_size, gt[0] + gt[1] * x_size, gt[3]])
+        if len(extents) == 1:
+            res = (gt[1], gt[5])
+    extents = numpy.array(extents)
+    # the name depends on the correction file, the raster may have changed since an earlier run, so it is warped
+    # again in any case
+    stat = os.stat(file_cor)
+    cor_hash = hashlib.sha1("{}|{}|{}".format(os.path.abspath(file_cor), stat.st_mtime_ns,
+                                              stat.st_size).encode()).hexdigest()[:16]
+    for file in os.listdir(dir):
+        if file.startswith("correction_warped"):
+            os.remove(dir + "/" + file)
+    for cluster_number, cluster in enumerate(cluster_extents(extents)):
+        cluster_extent = [extents[cluster, 0].min(), extents[cluster, 1].min(),
+                          extents[cluster, 2].max(), extents[cluster, 3].max()]
+        # a sparse cluster would result in a large warped correction file with mostly unused cells
+        box_area = (cluster_extent[2] - cluster_extent[0]) * (cluster_extent[3] - cluster_extent[1])
+        raster_area = ((extents[cluster, 2] - extents[cluster, 0]) * (extents[cluster, 3] - extents[cluster, 1])).sum()
+        if box_area > max_area_ratio * raster_area:
+            continue
+        out_file = dir + "/correction_warped_" + cor_hash + "_" + str(cluster_number) + ".tif"
+        cor_warp = gdal.Warp(out_file,
+                             file_cor,
+                             dstSRS=epsg,
+                             xRes=res[0],
+                             yRes=res[1],
+                             resampleAlg='bilinear',
+                             outputBounds=cluster_extent,
+                             format="GTiff",
+                             creationOptions=['COMPRESS=DEFLATE', 'TILED=YES'])
+        if cor_warp is None:
+            raise IOError("The correction file " + file_cor + " could not be warped to " + out_file + ".")
+        # close the dataset so that the file is written completely
+        cor_warp = None
+        for index in cluster:
+            warped_cors[raster_list[index]] = out_file
+    return warped_cors
+
+
+def cluster_extents(extents):
+    """
+    groups extensions into clusters of extensions that touch or overlap each other (directly or via other
+    extensions of the cluster)
+
+    Parameters
+    ----------
+    extents: numpy.ndarray
+        array with [minX, minY, maxX, maxY] of each extension as rows
+
+    Returns
+    -------
+    clusters: list of list of int
+        the indices of the extensions of each cluster
+    """
+    # which extensions touch or overlap each other
+    touching = (extents[:, None, 0] <= extents[None, :, 2]) & (extents[None, :, 0] <= extents[:, None, 2]) & \
+               (extents[:, None, 1] <= extents[None, :, 3]) & (extents[None, :, 1] <= extents[:, None, 3])
+    clusters = []
+    assigned = numpy.zeros(len(extents), dtype=bool)
+    for start in range(len(extents)):
+        if assigned[start]:
+            continue
+        # collect the cluster by following the touching extensions
+        assigned[start] = True
+        cluster = [start]
+        next_index = 0
+        while next_index < len(cluster):
+            neighbours = numpy.flatnonzero(touching[cluster[next_index]] & ~assigned)
+            assigned[neighbours] = True
+            cluster.extend(neighbours.tolist())
+            next_index = next_index + 1
+        clusters.append(sorted(cluster))
+    return clusters
+
+
+def create_geo_file_dic(dir, file):
+    """
+    calculate the geometric extension of a raster
+
+    Parameters
+    ----------
+    dir: str
+        directory
+    file: str
+        name of th file
+
+    Returns
+    -------
+    dict
+        dict of {str: array[int]} with the path as str and an array with the geometric extension with
+        the following values [minX, minY, maxX, maxY]
+    """
+    raster_str = dir + "/" + file
+    gt, x_size, y_size = get_raster_grid(raster_str)
+    extent = [gt[0], gt[3] + gt[5] * y_size,
+              gt[0] + gt[1] * x_size, gt[3]]
+    return {"file": raster_str, "extent": extent}
+
+
+def get_raster_grid(raster_str):
+    """
+    returns the geotransform and the size of a raster, for XYZ files they are read from the first and last lines
+    (see read_xyz_grid) instead of opening the file with GDAL
+
+    Parameters
+    ----------
+    raster_str: str
+        path of the raster
+
+    Returns
+    -------
+    gt: tuple of float
+        geotransform
+    x_size: int
+        number of columns
+    y_size: int
+        number of rows
+    """
+    if raster_str.endswith(".xyz"):
+        return read_xyz_grid(raster_str)
+    raster = gdal.Open(raster_str)
+    return raster.GetGeoTransform(), raster.RasterXSize, raster.RasterYSize
+
+
+def read_xyz_grid(file_xyz, head_size=1024 * 1024):
+    """
+    reads the geotransform and the size of the grid of a XYZ file (lines of x, y and z separated by spaces, sorted
+    by rows) from its first and last lines. The coordinates are the centers of the cells, the rows are north-up.
+    The grid is only valid if the file contains a line for each of its cells (e.g. not on the border of the state), so
+    the lines are counted and if their number differs, the whole file is parsed with read_xyz.
+
+    Parameters
+    ----------
+    file_xyz: str
+        path of the XYZ file
+    head_size: int, default=1024 * 1024
+        number of bytes read from the beginning of the file to find the resolution
+
+    Returns
+    -------
+    gt: tuple of float
+        geotransform
+    x_size: int
+        number of columns
+    y_size: int
+        number of rows
+    """
+    with open(file_xyz, "rb") as file, mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as xyz:
+        head = xyz[:head_size]
+        # the last line, trailing line breaks are skipped
+        tail = xyz[max(0, len(xyz) - 4096):].rstrip()
+        last_line = tail[tail.rfind(b"\n") + 1:]
+        end = max(0, len(xyz) - 4096) + len(tail)
+        number_of_lines = count_lines(xyz, end)
+    if len(head) == head_size:
+        head = head[:head.rfind(b"\n")]
+    head = numpy.fromstring(head, sep=" ").reshape(-1, 3)
+    first = head[0]
+    last = numpy.fromstring(last_line, sep=" ")[:3]
+    # resolution from the first row and the first change of the row
+    x_steps = numpy.abs(numpy.diff(head[:, 0][head[:, 1] == first[1]]))
+    y_steps = numpy.abs(head[:, 1][head[:, 1] != first[1]][:1] - first[1])
+    x_res = x_steps[0] if len(x_steps) > 0 else (y_steps[0] if len(y_steps) > 0 else 1.0)
+    y_res = y_steps[0] if len(y_steps) > 0 else x_res
+    min_x, max_x = min(first[0], last[0]), max(first[0], last[0])
+    min_y, max_y = min(first[1], last[1]), max(first[1], last[1])
+    x_size = int(round((max_x - min_x) / x_res)) + 1
+    y_size = int(round((max_y - min_y) / y_res)) + 1
+    # cells are missing, so the first and the last line are not the corners of the grid
+    if number_of_lines != x_size * y_size:
+        data, gt = read_xyz(file_xyz)
+        return gt, data.shape[1], data.shape[0]
+    gt = (float(min_x - x_res / 2), float(x_res), 0.0, float(max_y + y_res / 2), 0.0, float(-y_res))
+    return gt, x_size, y_size
+
+
+def count_lines(xyz, end, chunk_size=16 * 1024 * 1024):
+    """
+    counts the lines of the first bytes of a memory-mapped file chunk by chunk
+
+    Parameters
+    ----------
+    xyz: mmap.mmap
+        the memory-mapped file
+    end: int
+        number of bytes to count the lines of, they should not end with a line break
+    chunk_size: int, default=16 * 1024 * 1024
+        number of bytes that are copied from the file at once
+
+    Returns
+    -------
+    int
+        number of lines
+    """
+    if end == 0:
+        return 0
+    line_breaks = 0
+    for start in range(0, end, chunk_size):
+        line_breaks = line_breaks + xyz[start:min(start + chunk_size, end)].count(b"\n")
+    return line_breaks + 1
+
+
+def parse_xyz(xyz, chunk_size=16 * 1024 * 1024):
+    """
+    parses the lines of a memory-mapped XYZ file with numpy.fromstring. The file is parsed chunk by chunk (each ends
+    with a line break), so it is never copied as a whole.
+
+    Parameters
+    ----------
+    xyz: mmap.mmap
+        the memory-mapped file
+    chunk_size: int, default=16 * 1024 * 1024
+        number of bytes that are parsed at once
+
+    Returns
+    -------
+    values: numpy.ndarray
+        array with x, y and z as columns
+    """
+    chunks = []
+    start = 0
+    while start < len(xyz):
+        end = min(start + chunk_size, len(xyz))
+        if end < len(xyz):
+            # end the chunk after the last complete line
+            line_break = xyz.rfind(b"\n", start, end)
+            if line_break == -1:
+                line_break = xyz.find(b"\n", end)
+            end = len(xyz) if line_break == -1 else line_break + 1
+        chunks.append(numpy.fromstring(xyz[start:end], sep=" "))
+        start = end
+    if len(chunks) == 0:
+        return numpy.empty((0, 3))
+    return numpy.concatenate(chunks).reshape(-1, 3)
+
+
+def read_xyz(file_xyz, nodata=numpy.nan):
+    """
+    reads a XYZ file (see read_xyz_grid) into a grid. The file is memory-mapped and parsed in bulk (see parse_xyz).
+    The extent of the grid is taken from all lines, so cells may be missing anywhere.
+
+    Parameters
+    ----------
+    file_xyz: str
+        path of the XYZ file
+    nodata: float, default=numpy.nan
+        value of the cells without a line in the file
+
+    Returns
+    -------
+    data: numpy.ndarray
+        grid of the z values (float32, north-up)
+    gt: tuple of float
+        geotransform
+    """
+    with open(file_xyz, "rb") as file, mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as xyz:
+        values = parse_xyz(xyz)
+    if len(values) == 0:
+        raise ValueError("The XYZ file " + file_xyz + " contains no values.")
+    # resolution from the smallest distance between the coordinates
+    x_steps = numpy.diff(numpy.unique(values[:, 0]))
+    y_steps = numpy.diff(numpy.unique(values[:, 1]))
+    x_res = x_steps.min() if len(x_steps) > 0 else (y_steps.min() if len(y_steps) > 0 else 1.0)
+    y_res = y_steps.min() if len(y_steps) > 0 else x_res
+    min_x, max_x = values[:, 0].min(), values[:, 0].max()
+    min_y, max_y = values[:, 1].min(), values[:, 1].max()
+    x_size = int(round((max_x - min_x) / x_res)) + 1
+    y_size = int(round((max_y - min_y) / y_res)) + 1
+    gt = (float(min_x - x_res / 2), float(x_res), 0.0, float(max_y + y_res / 2), 0.0, float(-y_res))
+    # the cell of each line
+    cols = numpy.rint((values[:, 0] - min_x) / x_res).astype(numpy.int64)
+    rows = numpy.rint((max_y - values[:, 1]) / y_res).astype(numpy.int64)
+    if cols.min() < 0 or cols.max() >= x_size or rows.min() < 0 or rows.max() >= y_size:
+        raise ValueError("The coordinates of the XYZ file " + file_xyz + " do not lie on a regular grid.")
+    data = numpy.full((y_size, x_size), nodata, dtype=numpy.float32)
+    data[rows, cols] = values[:, 2]
+    return data, gt
+
+
+def ingest_xyz_tiles(folder_path, epsg="EPSG: 25832", record_name="xyz_ingest.json"):
+    """
+    converts every XYZ file of a folder once into a Cloud Optimized GeoTiff (see xyz_to_cog) with the name of the XYZ
+    file and the ending _cog.tif. The conversions are recorded (name, size and modification time of the XYZ file) in
+    a JSON file in the folder, so a XYZ file is only converted again if it has changed or its GeoTiff is missing.
+    A conversion is only recorded once its GeoTiff exists, the record is also written if a conversion fails.
+
+    Parameters
+    ----------
+    folder_path: str
+        path of the folder with the XYZ files
+    epsg: str, default=EPSG: 25832
+        EPSG-code of the XYZ files
+    record_name: str, default=xyz_ingest.json
+        name of the JSON file with the record of the conversions
+
+    Returns
+    -------
+    cog_list: list of str
+        names of the GeoTiffs in the order of the XYZ files
+    """
+    record_path = folder_path + "/" + record_name
+    record = {}
+    if os.path.exists(record_path):
+        with open(record_path) as file:
+            record = json.load(file)
+    cog_list = []
+    changed = False
+    try:
+        for file in os.listdir(folder_path):
+            if not file.endswith(".xyz"):
+                continue
+            stat = os.stat(folder_path + "/" + file)
+            cog = file[:-len(".xyz")] + "_cog.tif"
+            entry = {"cog": cog, "size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+            # convert the file if it is new or has changed
+            if record.get(file) != entry or not os.path.exists(folder_path + "/" + cog):
+                record.pop(file, None)
+                changed = True
+                xyz_to_cog(file_xyz=folder_path + "/" + file, file_cog=folder_path + "/" + cog, epsg=epsg)
+                if not os.path.exists(folder_path + "/" + cog):
+                    raise IOError("The XYZ file " + file + " could not be converted into " + cog + ".")
+                record[file] = entry
+            cog_list.append(cog)
+    finally:
+        if changed:
+            # replace the record instead of writing into it, because it may be linked into other folders
+            with open(record_path + ".tmp", "w") as file:
+                json.dump(record, file, indent=1)
+            os.replace(record_path + ".tmp", record_path)
+    return cog_list
+
+
+def xyz_to_cog(file_xyz, file_cog, epsg="EPSG: 25832"):
+    """
+    converts a XYZ file into a DEFLATE compressed Cloud Optimized GeoTiff (tiled, with overviews). The XYZ file is
+    read with read_xyz, cells without a value are 0 like with the XYZ driver of GDAL. The overviews are built in
+    memory and copied in front of the image data (COPY_SRC_OVERVIEWS), which needs no COG driver (GDAL 3.1).
+
+    Parameters
+    ----------
+    file_xyz: str
+        path of the XYZ file
+    file_cog: str
+        path of the GeoTiff
+    epsg: str, default=EPSG: 25832
+        EPSG-code of the XYZ file
+
+    Returns
+    -------
+    """
+    data, gt = read_xyz(file_xyz, nodata=0)
+    mem = gdal.GetDriverByName("MEM").Create("", data.shape[1], data.shape[0], 1, gdal.GDT_Float32)
+    mem.SetGeoTransform(gt)
+    mem.GetRasterBand(1).WriteArray(data)
+    # overviews down to the size of one block
+    levels = []
+    while max(data.shape) // (2 ** (len(levels) + 1)) >= 256:
+        levels.append(2 ** (len(levels) + 1))
+    if len(levels) > 0:
+        mem.BuildOverviews("AVERAGE", levels)
+    cog = gdal.Translate(file_cog, mem, format="GTiff", outputSRS=epsg,
+                         creationOptions=["TILED=YES", "BLOCKXSIZE=256", "BLOCKYSIZE=256", "COMPRESS=DEFLATE",
+                                          "PREDICTOR=3", "COPY_SRC_OVERVIEWS=YES"])
+    if cog is None:
+        if os.path.exists(file_cog):
+            os.remove(file_cog)
+        raise IOError("The XYZ file " + file_xyz + " could not be converted into " + file_cog + ".")
+    # close the dataset so that the file is written completely
+    cog = None
+
+
+def raster_correction(dir, file_raster, file_cor, ending, epsg="EPSG: 25832", warped_cor=None, memory_budget_mb=256):
+    """
+    corrects every raster value by addition with a second raster (correction file).
+    Writes the result as a new GeoTiff by replacing the original file extension with _UTM_cor.tif
+    If a warped correction file (see warp_correction) is given and the raster lies on its pixel grid, the window of
+    the raster is read from it, otherwise the correction file is warped for this raster.
+    The raster is corrected in strips of whole blocks, so the memory used does not exceed the memory budget.
+
+    Parameters
+    ----------
+    dir: str
+        directory
+    file_raster: str
+        name of the input raster
+    file_cor: str
+        path of the correction-raster-file
+    ending: str
+        file extension of the input raster
+    epsg: str, optional, default=EPSG: 25832
+        EPSG-code of the input raster. just necessary if not EPSG: 25832
+    warped_cor: str or None, default=None
+        path of the correction file warped to the grid of the raster
+    memory_budget_mb: int or float, default=256
+        memory budget of the correction in MB
+
+    Returns
+    -------
+    dict
+        dict of {str: array[int]} with the path as str and an array with the geometric extension with
+        the following values [minX, minY, maxX, maxY] for the calculated raster
+    """
+    raster_str = dir + "/" + file_raster
+    out_file = raster_str.replace(ending, "_UTM_cor.tif")
+    # open raster, XYZ files are parsed at once with read_xyz
+    if ending == ".xyz":
+        data, gt = read_xyz(raster_str, nodata=0)
+        y_size, x_size = data.shape
+        band = None
+    else:
+        raster = gdal.Open(raster_str)
+        gt = raster.GetGeoTransform()
+        x_size = raster.RasterXSize
+        y_size = raster.RasterYSize
+        band = raster.GetRasterBand(1)
+    # calculate extension
+    extent = [gt[0], gt[3] + gt[5] * y_size,
+              gt[0] + gt[1] * x_size, gt[3]]
+    # [minX, minY, maxX, maxY]
+
+    # read the window of the raster from the warped correction if the raster lies on its grid
+    cor_offset = None
+    if warped_cor is not None:
+        cor_warp = gdal.Open(warped_cor)
+        cor_gt = cor_warp.GetGeoTransform()
+        x_off = (gt[0] - cor_gt[0]) / cor_gt[1]
+        y_off = (gt[3] - cor_gt[3]) / cor_gt[5]
+        if cor_gt[1] == gt[1] and cor_gt[5] == gt[5] and abs(x_off - round(x_off)) < 1e-6 and \
+                abs(y_off - round(y_off)) < 1e-6 and 0 <= round(x_off) <= cor_warp.RasterXSize - x_size and \
+                0 <= round(y_off) <= cor_warp.RasterYSize - y_size:
+            cor_offset = (int(round(x_off)), int(round(y_off)))
+            cor_gt = (gt[0], cor_gt[1], cor_gt[2], gt[3], cor_gt[4], cor_gt[5])
+    if cor_offset is None:
+        # warp correction, so that it matches the input raster in crs, extension and resolution
+        cor_warp = gdal.Warp("",
+                             file_cor,
+                             dstSRS=epsg,
+                             xRes=gt[1],
+                             yRes=gt[5],
+                             resampleAlg='bilinear',
+                             outputBounds=extent,
+                             format="vrt")
+        cor_offset = (0, 0)
+        cor_gt = cor_warp.GetGeoTransform()
+    # driver for output
+    driver = gdal.GetDriverByName("GTiff")
+    ds_out = driver.Create(out_file, x_size, y_size, 1, gdal.GDT_UInt16)
+    ds_out.SetGeoTransform(cor_gt)  # sets same geotransform as input
+    ds_out.SetProjection(cor_warp.GetProjection())  # sets same projection as input
+    band_out = ds_out.GetRasterBand(1)
+    # correction strip by strip
+    cor_band = cor_warp.GetRasterBand(1)
+    if band is None:
+        rows = get_strip_rows(x_size, 1, memory_budget_mb)
+    else:
+        rows = get_strip_rows(x_size, band.GetBlockSize()[1], memory_budget_mb)
+    for row in range(0, y_size, rows):
+        strip_rows = min(rows, y_size - row)
+        if band is None:
+            strip = data[row:row + strip_rows]
+        else:
+            strip = band.ReadAsArray(0, row, x_size, strip_rows)
+        data_out = strip + cor_band.ReadAsArray(cor_offset[0], cor_offset[1] + row, x_size, strip_rows)
+        band_out.WriteArray(data_out, 0, row)
+    return {"file": out_file, "extent": extent}
+
+
+def get_strip_rows(x_size, block_rows=1, memory_budget_mb=256):
+    """
+    calculates the number of rows of a raster that can be corrected at once within the memory budget. The number
+    is a multiple of the block height of the raster, but at least one block.
+
+    Parameters
+    ----------
+    x_size: int
+        number of columns of the raster
+    block_rows: int, default=1
+        block height of the raster band
+    memory_budget_mb: int or float, default=256
+        memory budget in MB
+
+    Returns
+    -------
+    int
+        number of rows
+    """
+    block_rows = max(block_rows, 1)
+    # the input, the correction, their sum and the output strip with up to 8 bytes per value
+    row_bytes = x_size * 8 * 4
+    rows = int(memory_budget_mb * 1024 * 1024 // row_bytes)
+    return max(rows // block_rows, 1) * block_rows
+
+
+# main function
+def auto_download(working_dir, path_shp, start_year_elev=None, month_start_year=1, end_year_elev=None,
+                  month_end_year=12, start_year_ortho=None, end_year_ortho=None, dgm=True, dom=True, las=True,
+                  ortho=True, file_cor_dgm=None, epsg_mosaic="EPSG: 25832", merge_dgm=True, merge_dom=True,
+                  merge_ortho=True, delete=True, download_workers=4, extract_on_download=True,
+                  manifest_path="tile_manifest.sqlite", refresh=False, dry_run=False, bandwidth_mbit=100,
+                  meta_data_cache_dir="meta_data_cache", correction_workers=1, correction_memory_mb=256):
+    """
+    The main function of the script, through the parameters of this function one can control the download of the
+    elevation data and orthophoto as well as the further processing of them (height correction and merging).
+    Depending on the parameters, the other functions of the script are called within this function to download the data
+    and perform the processing.
+
+    Parameters
+    ----------
+    working_dir: str
+        Path to the directory where the output is to be stored.
+    path_shp: str or geopandas.geodataframe.GeoDataFrame
+        Path to the shapefile of the area of interest or the area of interest itself.
+    start_year_elev: int or None, default=None
+        first year of interest for the elevation data
+    month_start_year: int, default=1
+        first month of interest for the elevation data
+    end_year_elev: int or None, default=None
+        last year of interest for the elevation data
+    month_end_year: int, default=12
+        last month of interest for the elevation data
+    start_year_ortho: int or None, default=None
+        first year of interest for the orthophotos
+    end_year_ortho: int or None, default=None
+        last year of interest for the orthophotos
+    dgm: bool, default=True
+        Are digital terrain models to be downloaded.
+    dom: bool, default=True
+        Are digital surface models to be downloaded.
+    las: bool, default=True
+        Should laser scanner data be downloaded.
+    ortho: bool, default=True
+        Should orthophotos be downloaded.
+    file_cor_dgm: str or None
+        Path to the height correction file.
+    epsg_mosaic: str, default=EPSG: 25832
+        EPSG-code of the merged mosaics.
+    merge_dgm: bool, default=True
+        Should the digital terrain models be merged.
+    merge_dom: bool, default=True
+        Should the digital surface models be merged.
+    merge_ortho: bool, default=True
+        Should the orthophotos be merged.
+    delete: bool, default=True
+        Should the Zip files be deleted.
+    download_workers: int, default=4
+        Number of concurrent downloads of the data tiles.
+    extract_on_download: bool, default=True
+        Should the data tiles be extracted (and their ZIP files deleted) directly after their download.
+    manifest_path: str or None, default=tile_manifest.sqlite
+        Path to the manifest of the downloaded data tiles (relative to the working directory). Several working
+        directories can share one manifest and thereby the data tiles. If None no manifest is used.
+    refresh: bool, default=False
+        Should the data tiles recorded in the manifest be downloaded again if they changed on the server.
+    dry_run: bool, default=False
+        If True, no data tiles are downloaded or processed. Only the meta data is downloaded to resolve the data tiles
+        and a report with the number, size and estimated download time of the data tiles is printed. The manifest and
+        the meta data cache are only read, if they do not exist they are not created.
+    bandwidth_mbit: int or float, default=100
+        Available bandwidth in Mbit/s, used to estimate the download time of a dry run.
+    meta_data_cache_dir: str or None, default=meta_data_cache
+        Folder (relative to the working directory) in which the parsed meta data and its intersection with the area of
+        interest are stored for the next runs (requires pyarrow). If None they are cached only for this run.
+    correction_workers: int, default=1
+        Number of worker processes for the height correction of the digital terrain models. On Windows, the calling
+        script must be guarded by if __name__ == "__main__" if more than one worker is used.
+    correction_memory_mb: int or float, default=256
+        Memory budget in MB of each worker process of the height correction.
+    Returns
+    -------
+    plan_df: pandas.core.frame.DataFrame or None
+        The download plan if it is a dry run.
+    """
+    # ---------- both ---------- #
+    # set working directory
+    os.chdir(working_dir)
+    # set aoi file path
+    aoi_fp = path_shp
+    # load the aoi shapefile as geodataframe (if necessary)
+    if isinstance(aoi_fp, geopandas.GeoDataFrame):
+        aoi = aoi_fp
+    else:
+        aoi = geopandas.read_file(aoi_fp)
+    # create a list in which the names of all zip files are stored
+    # so that they can be deleted at the end of the function
+    zip_files_to_delete = []
+    # in case of a dry run the data tiles to download are collected in this list
+    plan = None
+    if dry_run is True:
+        plan = []
+    # open the manifest of the data tiles, a dry run only reads an existing manifest
+    manifest = None
+    if manifest_path is not None and dry_run is False:
+        manifest = TileManifest(path=manifest_path)
+    elif manifest_path is not None and os.path.exists(manifest_path):
+        manifest = TileManifest(path=manifest_path, read_only=True)
+    # the meta data shapefiles are read and intersected only once per collection period (a dry run stores nothing)
+    meta_data_cache = MetaDataCache(folder=meta_data_cache_dir, read_only=dry_run)
+
+    # ---------- elevation data ---------- #
+    # check if the user made the required specifications
+    products = [product for product, selected in [("dgm", dgm), ("dom", dom), ("las", las)] if selected is True]
+    if start_year_elev is not None and end_year_elev is not None and len(products) > 0:
+        # resolve all data tiles before the download
+        elev_plan, tile_counts = create_elev_download_plan(aoi=aoi, meta_data_cache=meta_data_cache,
+                                                           start_year=start_year_elev, end_year=end_year_elev,
+                                                           month_start_year=month_start_year,
+                                                           month_end_year=month_end_year, products=products,
+                                                           zip_files_to_delete=zip_files_to_delete)
+        # give the user feedback about years without data or with data only for a part of the area
+        report_elev_download_plan(elev_plan=elev_plan, tile_counts=tile_counts, start_year=start_year_elev,
+                                  end_year=end_year_elev, month_start_year=month_start_year,
+                                  month_end_year=month_end_year)
+        # collect the download jobs of all types, periods and years and download them together
+        download_jobs = []
+        downloaded = []
+        for (product, url_year, year), group in elev_plan.groupby(["product", "period", "year"], sort=True):
+            dem_n = set_elev_variables(year=int(url_year[-4:]))[1]
+            elev_data_list = data_download(type_to_download=product, url_year=url_year, year=year,
+                                           data_list_to_download=list(group["tile_number"]), dem_n=dem_n,
+                                           additional_check_2019=url_year == "2020-2025" and year < 2020,
+                                           workers=download_workers, extract=extract_on_download,
+                                           manifest=manifest, refresh=refresh, plan=plan, job_list=download_jobs)
+            # in case of a dry run nothing is unzipped
+            if elev_data_list != "no_new_data" and plan is None:
+                downloaded.append((product, "elevation_data/" + product + "/" + str(year), elev_data_list))
+        download_zip_files(download_jobs=download_jobs, workers=download_workers, manifest=manifest)
+        # if data was downloaded unzip it and add the zip names to the list of zip files that are to delete
+        # convert the new XYZ files that are corrected or merged into Cloud Optimized GeoTiffs
+        for product, folder_path, elev_data_list in downloaded:
+            create_and_unzip(folder_path=folder_path, zip_files=elev_data_list, manifest=manifest)
+            zip_files_to_delete.extend(elev_data_list)
+            if product == "dgm" and (file_cor_dgm is not None or merge_dgm is True) or \
+                    product == "dom" and merge_dom is True:
+                ingest_xyz_tiles(folder_path=folder_path)
+
+    # ---------- image data ---------- #
+    # check if the user made the required specifications
+    if ortho is True and start_year_ortho is not None and end_year_ortho is not None:
+        # download shp with tile numbers if necessary (auxiliary data)
+        aux_data_name = data_download(data_list_to_download=["meta_data_elevation_data_" + "2010-2013"],
+                                      type_to_download="auxiliary_data", url_year="2010-2013")
+        # create folder for image data and unzip auxiliary data if necessary
+        if aux_data_name != "no_new_data" or not os.path.exists("image_data/auxiliary_data"):
+            zip_files_to_delete.extend(aux_data_name)
+            create_and_unzip(folder_path="image_data/auxiliary_data",
+                             zip_files=["meta_data_elevation_data_" + "2010-2013"])
+        # intersect aoi and tile_number_shp
+        aoi_tile_numbers_geodf = meta_data_cache.intersect(aoi=aoi, path="image_data/auxiliary_data/" +
+                                                           "DGM2_2010-2013_Erfass-lt-Meta_UTM32-UTM_2014-12-10.shp")
+        # create tile number df
+        tile_number_df = c_tile_number_df(geodf=aoi_tile_numbers_geodf)
+        # download url_id_file if necessary
+        url_id_data = data_download(data_list_to_download=["url_id_data"], type_to_download="auxiliary_data")
+        # extract url_id_file if necessary
+        # add the zip name to the list of zip files that are to delete
+        if url_id_data != "no_new_data" or not os.path.exists("image_data/auxiliary_data/url_id_file.csv"):
+            zip_files_to_delete.extend(url_id_data)
+            create_and_unzip(folder_path="image_data/auxiliary_data/", zip_files=["url_id_data"])
+        # load (and if necessary build) the url id index
+        url_id_index = UrlIdIndex(csv_path="image_data/auxiliary_data/url_id_file.csv")
+        # before 2019 the orthophoto covers a 2x2 km area and this affects the tile numbers
+        # split the year range (if necessary)
+        if end_year_ortho >= 2019 and start_year_ortho < 2019:
+            # get the relevant url ids, years and tile numbers
+            url_id_list, year_list, tile_number_list, partly_data_list = get_relevant_url_ids(
+                url_id_index=url_id_index,
+                tile_number_df=tile_number_df,
+                start_year=2019,
+                end_year=end_year_ortho)
+            url_id_list_2, year_list_2, tile_number_list_2, partly_data_list_2 = get_relevant_url_ids(
+                url_id_index=url_id_index,
+                tile_number_df=tile_number_df,
+                start_year=start_year_ortho,
+                end_year=2018)
+            url_id_list.extend(url_id_list_2)
+            year_list.extend(year_list_2)
+            tile_number_list.extend(tile_number_list_2)
+            partly_data_list.extend(partly_data_list_2)
+        else:
+            url_id_list, year_list, tile_number_list, partly_data_list = get_relevant_url_ids(
+                url_id_index=url_id_index,
+                tile_number_df=tile_number_df,
+                start_year=start_year_ortho,
+                end_year=end_year_ortho)
+        # inform the user if there are no orthophotos available
+        for year in range(start_year_ortho, end_year_ortho + 1):
+            if (year in year_list) is False:
+                print("There are no orthophotos available for the area for " + str(year) + ".")
+        # inform the user if the orthophotos available for a year does not cover the whole aoi
+        for year in partly_data_list:
+            print("Only for a part of the area there are orthophotos available available for " + str(year) + ".")
+        # download orthophotos
+        image_data = data_download(type_to_download="ortho", data_list_to_download=url_id_list,
+                                   year_list=year_list, tile_number_list=tile_number_list,
+                                   workers=download_workers, extract=extract_on_download, manifest=manifest,
+                                   refresh=refresh, plan=plan)
+        # if data was downloaded unzip it and add the zip names to the list of zip files that are to delete
+        # (in case of a dry run nothing is unzipped)
+        if image_data != "no_new_data" and plan is None:
+            zip_files_to_delete.extend(image_data)
+            # loop to create a new folder for each year
+            index = 0
+            for zip_file_name in image_data:
+                create_and_unzip(folder_path="image_data/orthophotos/" + str(year_list[index]),
+                                 zip_files=[zip_file_name], manifest=manifest)
+                index = index + 1
+
+    # ---------- both ---------- #
+    # in case of a dry run report the plan and stop
+    if dry_run is True:
+        if manifest is not None:
+            manifest.close()
+        return create_download_report(plan=plan, bandwidth_mbit=bandwidth_mbit)
+    # dgm correction and raster merging
+    if file_cor_dgm is not None:
+        geo_file_handler_list = go_through_all_raster("./elevation_data/dgm", ".xyz", file_cor_dgm,
+                                                      workers=correction_workers,
+                                                      memory_budget_mb=correction_memory_mb)
+        if merge_dgm is True:
+            for i in range(len(geo_file_handler_list)):
+                geo_file_handler_list[i].create_vrt("dgm_mosaic_"+geo_file_handler_list[i].name, epsg_mosaic)
+    else:
+        if merge_dgm is True:
+            geo_file_handler_list = go_through_all_raster("./elevation_data/dgm", ".xyz")
+            for i in range(len(geo_file_handler_list)):
+                geo_file_handler_list[i].create_vrt("dgm_mosaic_"+geo_file_handler_list[i].name, epsg_mosaic)
+    if merge_dom is True:
+        geo_file_handler_list = go_through_all_raster("./elevation_data/dom", ".xyz")
+        for i in range(len(geo_file_handler_list)):
+            geo_file_handler_list[i].create_vrt("dom_mosaic_"+geo_file_handler_list[i].name, epsg_mosaic)
+    if merge_ortho is True:
+        geo_file_handler_list = go_through_all_raster("./image_data/orthophotos", ".tif")
+        for i in range(len(geo_file_handler_list)):
+            geo_file_handler_list[i].create_vrt("ortho_mosaic_"+geo_file_handler_list[i].name, epsg_mosaic)
+
+    # if it is wanted delete the zip files
+    if delete is True:
+        delete_zip_files(zip_files=zip_files_to_delete)
+    if manifest is not None:
+        manifest.close()
+
+
+def batch_download(path_shps, store_dir, output_dir, name_column=None, manifest_path="tile_manifest.sqlite",
+                   meta_data_cache_dir="meta_data_cache", **kwargs):
+    """
+    Downloads the data for several areas of interest at once. The data tiles of the union of all areas are
+    downloaded only once into a shared store (a working directory with a manifest). Then auto_download is executed for
+    each area in its own working directory in the output directory, where the data tiles are linked from the store
+    (see TileManifest.provide) and the correction and merging are executed.
+
+    Parameters
+    ----------
+    path_shps: str or list of str
+        Path(s) to the shapefile(s) of the areas of interest.
+    store_dir: str
+        Path to the directory in which the data tiles are stored.
+    output_dir: str
+        Path to the directory in which a working directory is created for each area of interest.
+    name_column: str or None, default=None
+        If given, each feature of the shapefiles is an area of interest, named by the value of this column. Otherwise
+        each shapefile is an area of interest, named by the name of the file.
+    manifest_path: str, default=tile_manifest.sqlite
+        Path to the manifest of the downloaded data tiles (relative to the store directory).
+    meta_data_cache_dir: str or None, default=meta_data_cache
+        Folder (relative to the store directory) of the meta data cache (see auto_download).
+    kwargs:
+        The other parameters of auto_download (e.g. start_year_elev, dgm, file_cor_dgm or merge_dgm).
+
+    Returns
+    -------
+    plan_df: pandas.core.frame.DataFrame or None
+        The download plan of the union of the areas of interest if it is a dry run.
+    """
+    if manifest_path is None:
+        raise ValueError("The batch download needs a manifest to share the data tiles.")
+    if isinstance(path_shps, str):
+        path_shps = [path_shps]
+    # the working directory is changed by auto_download
+    cwd = os.getcwd()
+    store_dir = os.path.abspath(store_dir)
+    output_dir = os.path.abspath(output_dir)
+    manifest_path = os.path.join(store_dir, manifest_path)
+    if meta_data_cache_dir is not None:
+        meta_data_cache_dir = os.path.join(store_dir, meta_data_cache_dir)
+    # load the areas of interest
+    aois = dict()
+    for path_shp in path_shps:
+        geodf = geopandas.read_file(os.path.join(cwd, path_shp))
+        if name_column is None:
+            aois[os.path.splitext(os.path.basename(path_shp))[0]] = geodf
+        else:
+            for name, feature_geodf in geodf.groupby(name_column, sort=False):
+                aois[str(name)] = feature_geodf
+    # union of all areas of interest (in the crs of the first area)
+    crs = next(iter(aois.values())).crs
+    union = geopandas.GeoDataFrame(geometry=[pandas.concat([aoi.to_crs(crs) for aoi in aois.values()]).unary_union],
+                                   crs=crs)
+    os.makedirs(store_dir, exist_ok=True)
+    try:
+        # download the data tiles of all areas once
+        store_kwargs = dict(kwargs, file_cor_dgm=None, merge_dgm=False, merge_dom=False, merge_ortho=False)
+        plan_df = auto_download(working_dir=store_dir, path_shp=union, manifest_path=manifest_path,
+                                meta_data_cache_dir=meta_data_cache_dir, **store_kwargs)
+        if kwargs.get("dry_run", False) is True:
+            return plan_df
+        # create the outputs of each area from the store
+        for name, aoi in aois.items():
+            aoi_dir = os.path.join(output_dir, name)
+            os.makedirs(aoi_dir, exist_ok=True)
+            # link the meta data, so it is not downloaded again
+            for folder in ["elevation_data/meta_data", "image_data/auxiliary_data"]:
+                link_folder(source=os.path.join(store_dir, folder), target=os.path.join(aoi_dir, folder))
+            auto_download(working_dir=aoi_dir, path_shp=aoi, manifest_path=manifest_path,
+                          meta_data_cache_dir=meta_data_cache_dir, **kwargs)
+    finally:
+        os.chdir(cwd)
+
+
+def link_folder(source, target):
+    """
+    Links (or copies) all files of a folder including the subfolders into another folder (see link_or_copy). Files
+    that already exist in the target folder are skipped.
+
+    Parameters
+    ----------
+    source: str
+        path of the folder
+    target: str
+        path of the target folder
+
+    Returns
+    -------
+    """
+    for root, _, files in os.walk(source):
+        target_root = os.path.join(target, os.path.relpath(root, source))
+        os.makedirs(target_root, exist_ok=True)
+        for file in files:
+            if not os.path.exists(os.path.join(target_root, file)):
+                link_or_copy(source=os.path.join(root, file), target=os.path.join(target_root, file))
@@ -1,208 +1,1014 @@
-# import packages
-import asyncio
-import aiohttp
-import pandas
-import os
-from tqdm import tqdm
-
-
-async def get_hcd(session, url):
-    """
-    The function requests the head content disposition from an URL and returns it together with the URL if an key error
-    occurs only the url is returned.
-
-    Parameters
-    ----------
-    session: aiohttp.client.ClientSession
-        the client session
-    url: str
-        The URL from which the header information should be read.
-
-    Returns
-    -------
-    head_content_disposition + "__" + url: srt
-        The head content disposition plus the corresponding URL as one string.
-    url: str
-        the URL
-    """
-    # if there is no answer to the request a key error will occur
-    try:
-        # request head
-        async with session.head(url) as resp:
-            # select hcd
-            head_content_disposition = resp.headers["content-disposition"]
-            # return hcd + url
-            return head_content_disposition + "__" + url
-    # if an key error occurs return the url
-    except KeyError:
-        return url
-
-
-# framework function for the request function
-async def framework_requests(start=0, stop=0, list_of_ids=None):
-    """
-    In this function first the framework for the request function is set. Then the request function is called repeatedly
-    to get the head content dispositions of the URLs.
-
-    Parameters
-    ----------
-    start: int
-        The number of the id part of the first URL to be checked.
-    stop: int
-        The number of the id part of the last URL to be checked.
-    list_of_ids: list of str or None
-        This Parameter should not be changed. It only plays a role in the additional checking of the key error URLs.
-
-    Returns
-    -------
-    hcd__url_list: list of str
-        A list with the head content dispositions plus the corresponding URLs.
-    url_key_error_list: list of str
-        A list with all URLs where a key error occurred.
-    """
-    # set timeout time / time limit
-    timeout = aiohttp.ClientTimeout(total=12000)
-    # create client session so that not every request will open an new connection
-    async with aiohttp.ClientSession(timeout=timeout) as session:
-        # create a tasks, hcd + url and only url(KeyError) list
-        tasks = list()
-        hcd__url_list = list()
-        url_key_error_list = list()
-        # check if there is a list of ids
-        if list_of_ids is not None:
-            # loop through the list
-            for number in list_of_ids:
-                # set url
-                url = "https://geoportal.geoportal-th.de/gaialight-th/_apps/dladownload/download.php?type=op&id=" + \
-                      str(number)
-                # append task to tasks list asyncio.ensure_future schedules the execution of the task
-                tasks.append(asyncio.ensure_future(get_hcd(session, url)))
-        # if there is no list there should be a range of values
-        else:
-            for number in range(start, stop):
-                url = "https://geoportal.geoportal-th.de/gaialight-th/_apps/dladownload/download.php?type=op&id=" + \
-                      str(number)
-                tasks.append(asyncio.ensure_future(get_hcd(session, url)))
-        # gather all Future tasks(executions of request function) and wait till they are finished
-        hcd__url_all = await asyncio.gather(*tasks)
-        # loop through the returns
-        for hcd__url in hcd__url_all:
-            # check if the return is hcd + url or only the url and append them to the appropriate  list
-            if hcd__url[0] != "h":
-                hcd__url_list.append(hcd__url)
-            else:
-                url_key_error_list.append(hcd__url)
-        # return hcd + url and only url(KeyError) list
-        return hcd__url_list, url_key_error_list
-
-
-def create_url_id_file(start, stop, out_path, number_of_requests=100):
-    """
-    This function creates CSV files with the id part ot the URL, the year of data acquisition and the tile number or
-    only the URL (if it is a key error URL) as columns.To achieve this, first the framework function is called to get
-    the head content dispositions or in case of a key error the URL. Then the information is filtered and the CSV files
-    are generated. Finally, the content of all non-key error CSV files is merged into one file.
-
-    Parameters
-    ----------
-    start: int
-        The number of the id part of the first URL to be checked.
-    stop: int
-        The number of the id part of the last URL to be checked.
-    out_path: str
-        Path to the folder where the output should be stored.
-    number_of_requests: int
-        Maximum number of concurrent requests (if the performance is not important, the default value should be kept).
-
-    Returns
-    -------
-    path_name: str
-        The path to the URL id file.
-    """
-    # prevents RuntimeError: Event loop is closed
-    asyncio.set_event_loop_policy(asyncio.WindowsSelectorEventLoopPolicy())
-    for i1 in tqdm(range(start, stop, number_of_requests)):
-        # run framework function
-        hcd__url_re_list, url_key_error_re_list = asyncio.run(framework_requests(start=i1, stop=i1+number_of_requests))
-        # cause the urls are sometimes not reachable for a short time
-        # every url that is unreachable  is checked for a second an if necessary even a third time
-        for i2 in range(0, 2):
-            if len(url_key_error_re_list) > 0:
-                # create list of error url ids
-                error_url_id_list = list()
-                # get url ids
-                for error_url_re in url_key_error_re_list:
-                    error_url_id = ""
-                    for i3 in range(6, 1, -1):
-                        if error_url_re[len(error_url_re) - i3:].isdigit() is True:
-                            error_url_id = int(error_url_re[len(error_url_re) - i3:])
-                            break
-                    # append url id to url id list
-                    error_url_id_list.append(error_url_id)
-                # run framework function with the error url id list as input
-                hcd__url_re_list2, url_key_error_re_list = \
-                    asyncio.run(framework_requests(list_of_ids=error_url_id_list))
-                # add hcd + ulr to the already existing hcd + ulr list
-                hcd__url_re_list = hcd__url_re_list + hcd__url_re_list2
-        # if the returned hcd + url list is not empty loop though the list
-        if len(hcd__url_re_list) != 0:
-            # create a list for the url ids, the years and the tile numbers
-            url_id_list = list()
-            year_list = list()
-            tile_number_list = list()
-            # get url id
-            for hcd__url_re in hcd__url_re_list:
-                url_id = ""
-                for i4 in range(6, 1, -1):
-                    if hcd__url_re[len(hcd__url_re) - i4:].isdigit() is True:
-                        url_id = int(hcd__url_re[len(hcd__url_re) - i4:])
-                        break
-                # get year
-                th_position = hcd__url_re.find("th")
-                year = hcd__url_re[th_position + 3:th_position + 7]
-                # get tile number
-                _32_position = hcd__url_re.find("_32_")
-                if _32_position != -1:
-                    tile_number = hcd__url_re[_32_position + 4:_32_position + 12]
-                else:
-                    _32_position = hcd__url_re.find("_32")
-                    tile_number = hcd__url_re[_32_position + 3:_32_position + 11]
-                # sort out some data that is not relevant
-                if tile_number == "tachment":
-                    continue
-                # append url ids an so on to the appropriate list
-                url_id_list.append(url_id)
-                year_list.append(year)
-                tile_number_list.append(tile_number)
-            # create df with the url id, year and tile number as columns
-            data = {"url_id": url_id_list, "year": year_list, "tile_number": tile_number_list}
-            url_id_df = pandas.DataFrame(data)
-            # set name for the csv file
-            name = str(i1) + "_" + str(i1+number_of_requests) + "_url_id_file.csv"
-            # export df as csv
-            url_id_df.to_csv(out_path+name, index=False)
-        # if url(KeyError) list is not empty export a csv data with the "error" urls
-        if len(url_key_error_re_list) != 0:
-            error_data = {"error_urls": url_key_error_re_list}
-            error_df = pandas.DataFrame(error_data)
-            name = str(i1) + "_" + str(i1+number_of_requests) + "_url_KeyError.csv"
-            error_df.to_csv(out_path+name, index=False)
-    # create list for the filenames
-    filenames_list = list()
-    # loop through files in the out_path directory
-    for file in os.scandir(out_path):
-        # convert to string cause argument of type 'nt.DirEntry' is not iterable
-        filename = str(file)
-        # check if the file is relevant
-        if "KeyError" not in filename and "url_id_file" in filename:
-            # add filename to filename list
-            filenames_list.append(filename[11:len(filename)-2])
-    try:
-        # combine the content of all the files
-        combined_content = pandas.concat([pandas.read_csv(out_path+filename) for filename in filenames_list])
-        # create a csv file with the combined content
-        path_name = out_path+"url_id_file.csv"
-        combined_content.to_csv(path_name, index=False)
-        return path_name
-    except ValueError:
-        print("There are no objects to concatenate. Probably there are no relevant files.")
+# import packages
+import asyncio
+import aiohttp
+import collections
+import contextlib
+import heapq
+import itertools
+import pandas
+import os
+import random
+import re
+import sys
+import threading
+import time
+from urllib.parse import urlsplit
+from tqdm import tqdm
+
+# id part at the end of an URL, e.g. 'https://...download.php?type=op&id=1'
+URL_ID_PATTERN = re.compile(r"id=(?P<url_id>\d+)$")
+# head content disposition plus URL, e.g. 'attachment; filename="dop20rgbi_32_644_5636_2_th_2019.zip"__https://...id=1'
+HCD__URL_PATTERN = re.compile(r"_32_?(?P<tile_number>\d{3}_\d{4}).*?th.(?P<year>\d{4}).*" + URL_ID_PATTERN.pattern)
+
+
+class RetryPolicy:
+    """
+    class to represent the retry policy for the requests to the geoportal (exponential backoff with full jitter)
+
+    Attributes
+    ----------
+    retries: int
+        number of retries after the first attempt
+    base_delay: float
+        delay in seconds before the first retry (upper bound of the jitter)
+    max_delay: float
+        maximum delay in seconds
+    """
+    def __init__(self, retries=3, base_delay=1.0, max_delay=60.0):
+        """
+        Construct all necessary attributes for the objects.
+        retries: int, default=3
+            number of retries after the first attempt
+        base_delay: float, default=1.0
+            delay in seconds before the first retry (upper bound of the jitter)
+        max_delay: float, default=60.0
+            maximum delay in seconds
+        """
+        self.retries = retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+
+    def delay(self, attempt):
+        """
+        returns a random delay between 0 and base_delay * 2 ** attempt (limited by max_delay)
+
+        Parameters
+        ----------
+        attempt: int
+            number of the failed attempt (starting with 0)
+
+        Returns
+        -------
+        float
+            the delay in seconds
+        """
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+
+
+class CircuitBreaker:
+    """
+    class to represent a circuit breaker. The outcome of the latest requests is tracked and if the error rate exceeds
+    a threshold, the circuit opens and all requests are paused for a cooldown time. It can be shared by threads and
+    coroutines.
+
+    Attributes
+    ----------
+    window: collections.deque
+        the outcome (True = success) of the latest requests
+    error_rate: float
+        error rate at which the circuit opens
+    min_requests: int
+        minimum number of tracked requests before the circuit can open
+    cooldown: float
+        pause in seconds when the circuit is open
+    open_until: float
+        time (time.monotonic) until which the circuit is open
+    lock: threading.Lock
+        lock for the access of several threads
+    """
+    def __init__(self, window=50, error_rate=0.5, min_requests=10, cooldown=30.0):
+        """
+        Construct all necessary attributes for the objects.
+        window: int, default=50
+            number of tracked requests
+        error_rate: float, default=0.5
+            error rate at which the circuit opens
+        min_requests: int, default=10
+            minimum number of tracked requests before the circuit can open
+        cooldown: float, default=30.0
+            pause in seconds when the circuit is open
+        """
+        self.window = collections.deque(maxlen=window)
+        self.error_rate = error_rate
+        self.min_requests = min_requests
+        self.cooldown = cooldown
+        self.open_until = 0.0
+        self.lock = threading.Lock()
+
+    def record(self, success):
+        """
+        records the outcome of a request and opens the circuit if the error rate is too high
+
+        Parameters
+        ----------
+        success: bool
+            was the request successful
+
+        Returns
+        -------
+        """
+        with self.lock:
+            self.window.append(success)
+            if len(self.window) >= self.min_requests and \
+                    self.window.count(False) / len(self.window) >= self.error_rate:
+                self.open_until = time.monotonic() + self.cooldown
+                # start with a new window after the pause
+                self.window.clear()
+
+    def wait_time(self):
+        """
+        returns how long requests have to wait until the circuit is closed again
+
+        Returns
+        -------
+        float
+            the waiting time in seconds (0 if the circuit is closed)
+        """
+        with self.lock:
+            return max(0.0, self.open_until - time.monotonic())
+
+
+class HostLimiter:
+    """
+    class to limit the number of concurrent requests per host for threads
+
+    Attributes
+    ----------
+    max_per_host: int
+        maximum number of concurrent requests per host
+    semaphores: dict of {str: threading.BoundedSemaphore}
+        one semaphore per host
+    lock: threading.Lock
+        lock for the creation of the semaphores
+    """
+    def __init__(self, max_per_host=8):
+        """
+        Construct all necessary attributes for the objects.
+        max_per_host: int, default=8
+            maximum number of concurrent requests per host
+        """
+        self.max_per_host = max_per_host
+        self.semaphores = {}
+        self.lock = threading.Lock()
+
+    @contextlib.contextmanager
+    def slot(self, url):
+        """
+        context manager that waits for a free slot of the host of the URL
+
+        Parameters
+        ----------
+        url: str
+            the requested URL
+
+        Returns
+        -------
+        """
+        host = urlsplit(url).netloc
+        with self.lock:
+            if host not in self.semaphores:
+                self.semaphores[host] = threading.BoundedSemaphore(self.max_per_host)
+            semaphore = self.semaphores[host]
+        with semaphore:
+            yield
+
+
+class ConcurrencyController:
+    """
+    class to adapt the number of concurrent requests (additive increase / multiplicative decrease). As long as the
+    requests are answered fast and without errors, the limit grows by about `increase` per window of requests. A
+    failed or slow request reduces the limit by the factor `decrease`, but only once per window: congestion signals
+    of requests that were started before the last reduction are ignored.
+
+    Attributes
+    ----------
+    limit: float
+        the current limit of concurrent requests
+    minimum: int
+        lower bound of the limit
+    maximum: int
+        upper bound of the limit
+    increase: float
+        additive increase of the limit per window of successful requests
+    decrease: float
+        factor by which the limit is reduced
+    latency_limit: float
+        latency in seconds above which a request counts as congestion
+    last_decrease: float
+        time (time.monotonic) of the last reduction
+    """
+    def __init__(self, start=100, minimum=10, maximum=1000, increase=1.0, decrease=0.5, latency_limit=5.0):
+        """
+        Construct all necessary attributes for the objects.
+        start: int, default=100
+            initial limit of concurrent requests
+        minimum: int, default=10
+            lower bound of the limit
+        maximum: int, default=1000
+            upper bound of the limit
+        increase: float, default=1.0
+            additive increase of the limit per window of successful requests
+        decrease: float, default=0.5
+            factor by which the limit is reduced
+        latency_limit: float, default=5.0
+            latency in seconds above which a request counts as congestion
+        """
+        self.minimum = minimum
+        self.maximum = max(maximum, minimum)
+        self.limit = float(min(max(start, self.minimum), self.maximum))
+        self.increase = increase
+        self.decrease = decrease
+        self.latency_limit = latency_limit
+        self.last_decrease = 0.0
+
+    def record(self, started, latency, congestion):
+        """
+        adapts the limit to the outcome of a request
+
+        Parameters
+        ----------
+        started: float
+            time (time.monotonic) at which the request was started
+        latency: float
+            duration of the request in seconds
+        congestion: bool
+            did the request fail (e.g. timeout or missing header)
+
+        Returns
+        -------
+        """
+        if congestion is True or latency > self.latency_limit:
+            # only one reduction per window
+            if started >= self.last_decrease:
+                self.limit = max(self.minimum, self.limit * self.decrease)
+                self.last_decrease = time.monotonic()
+        else:
+            self.limit = min(self.maximum, self.limit + self.increase / self.limit)
+
+    def get_limit(self):
+        """
+        returns the current limit of concurrent requests
+
+        Returns
+        -------
+        int
+            the limit
+        """
+        return int(self.limit)
+
+
+def create_event_loop(loop_backend="default"):
+    """
+    Creates a new event loop for the selected backend. The default backend uses the selector event loop on Windows
+    (prevents RuntimeError: Event loop is closed) and the standard event loop on all other platforms. The uvloop
+    backend requires the optional package uvloop (not available on Windows), if it is not installed the default
+    backend is used.
+
+    Parameters
+    ----------
+    loop_backend: str, default=default
+        The backend of the event loop ("default" or "uvloop").
+
+    Returns
+    -------
+    loop: asyncio.AbstractEventLoop
+        The new event loop.
+    """
+    if loop_backend == "uvloop":
+        try:
+            import uvloop
+            return uvloop.new_event_loop()
+        except ImportError:
+            print("uvloop is not installed, the default event loop is used.")
+    elif loop_backend != "default":
+        raise ValueError("Unknown event loop backend: " + str(loop_backend))
+    if sys.platform == "win32":
+        return asyncio.SelectorEventLoop()
+    return asyncio.new_event_loop()
+
+
+def run_async(coroutine, loop_backend="default"):
+    """
+    Runs a coroutine in a new event loop of the selected backend and closes the loop afterwards.
+
+    Parameters
+    ----------
+    coroutine: coroutine
+        The coroutine to run.
+    loop_backend: str, default=default
+        The backend of the event loop ("default" or "uvloop").
+
+    Returns
+    -------
+    result
+        The result of the coroutine.
+    """
+    loop = create_event_loop(loop_backend=loop_backend)
+    try:
+        asyncio.set_event_loop(loop)
+        return loop.run_until_complete(coroutine)
+    finally:
+        loop.run_until_complete(loop.shutdown_asyncgens())
+        asyncio.set_event_loop(None)
+        loop.close()
+
+
+def is_retryable_status(status):
+    """
+    Checks if a HTTP status code indicates a temporary error of the server.
+
+    Parameters
+    ----------
+    status: int
+        The HTTP status code.
+
+    Returns
+    -------
+    bool
+        True if the request should be retried.
+    """
+    return status == 429 or status >= 500
+
+
+async def request_head(session, url, retry_policy=None, breaker=None, allow_redirects=False):
+    """
+    The function requests the head of an URL. Failed requests (connection errors, timeouts and temporary server
+    errors) are retried according to the retry policy and reported to the circuit breaker.
+
+    Parameters
+    ----------
+    session: aiohttp.client.ClientSession
+        the client session
+    url: str
+        The URL from which the header information should be read.
+    retry_policy: RetryPolicy or None, default=None
+        The retry policy, if None the default policy is used.
+    breaker: CircuitBreaker or None, default=None
+        The circuit breaker shared by all requests.
+    allow_redirects: bool, default=False
+        Should redirects be followed.
+
+    Returns
+    -------
+    status: int or None
+        The HTTP status code, None if all attempts failed.
+    headers: multidict.CIMultiDictProxy or None
+        The headers of the response, None if all attempts failed.
+    """
+    if retry_policy is None:
+        retry_policy = RetryPolicy()
+    for attempt in range(retry_policy.retries + 1):
+        # wait while the circuit is open
+        if breaker is not None:
+            await asyncio.sleep(breaker.wait_time())
+        try:
+            async with session.head(url, allow_redirects=allow_redirects) as resp:
+                if not is_retryable_status(resp.status):
+                    if breaker is not None:
+                        breaker.record(True)
+                    return resp.status, resp.headers
+        except (aiohttp.ClientError, asyncio.TimeoutError):
+            pass
+        if breaker is not None:
+            breaker.record(False)
+        if attempt < retry_policy.retries:
+            await asyncio.sleep(retry_policy.delay(attempt))
+    return None, None
+
+
+async def get_hcd(session, url, retry_policy=None, breaker=None):
+    """
+    The function requests the head content disposition from an URL and returns it together with the URL if an key error
+    occurs only the url is returned.
+
+    Parameters
+    ----------
+    session: aiohttp.client.ClientSession
+        the client session
+    url: str
+        The URL from which the header information should be read.
+    retry_policy: RetryPolicy or None, default=None
+        The retry policy for failed requests.
+    breaker: CircuitBreaker or None, default=None
+        The circuit breaker shared by all requests.
+
+    Returns
+    -------
+    head_content_disposition + "__" + url: srt
+        The head content disposition plus the corresponding URL as one string.
+    url: str
+        the URL
+    """
+    # request head
+    status, headers = await request_head(session, url, retry_policy=retry_policy, breaker=breaker)
+    # if there is no answer to the request a key error will occur
+    try:
+        # select hcd
+        head_content_disposition = headers["content-disposition"]
+        # return hcd + url
+        return head_content_disposition + "__" + url
+    # if an key error occurs (or all attempts failed) return the url
+    except (KeyError, TypeError):
+        return url
+
+
+async def get_content_length(session, semaphore, url, retry_policy=None, breaker=None):
+    """
+    The function requests the head of an URL and returns the content length together with the URL. If the server does
+    not send a content length or the request fails, None is returned as content length.
+
+    Parameters
+    ----------
+    session: aiohttp.client.ClientSession
+        the client session
+    semaphore: asyncio.Semaphore
+        limits the number of concurrent requests
+    url: str
+        The URL from which the header information should be read.
+    retry_policy: RetryPolicy or None, default=None
+        The retry policy for failed requests.
+    breaker: CircuitBreaker or None, default=None
+        The circuit breaker shared by all requests.
+
+    Returns
+    -------
+    url: str
+        the URL
+    content_length: int or None
+        The size of the file in bytes.
+    """
+    async with semaphore:
+        status, headers = await request_head(session, url, retry_policy=retry_policy, breaker=breaker,
+                                             allow_redirects=True)
+        if status == 200:
+            content_length = headers.get("content-length")
+            if content_length is not None and content_length.isdigit():
+                return url, int(content_length)
+        return url, None
+
+
+async def framework_content_lengths(url_list, number_of_requests=100, limit_per_host=20):
+    """
+    Framework function that requests the content lengths of a list of URLs concurrently within one client session.
+
+    Parameters
+    ----------
+    url_list: list of str
+        The URLs from which the content length should be read.
+    number_of_requests: int, default=100
+        Maximum number of concurrent requests.
+    limit_per_host: int, default=20
+        Maximum number of concurrent connections per host.
+
+    Returns
+    -------
+    content_lengths: list of tuple
+        A list of tuples (URL, content length or None).
+    """
+    timeout = aiohttp.ClientTimeout(total=12000)
+    semaphore = asyncio.Semaphore(number_of_requests)
+    breaker = CircuitBreaker()
+    connector = aiohttp.TCPConnector(limit_per_host=limit_per_host)
+    async with aiohttp.ClientSession(timeout=timeout, connector=connector) as session:
+        tasks = [asyncio.ensure_future(get_content_length(session, semaphore, url, breaker=breaker))
+                 for url in url_list]
+        return await asyncio.gather(*tasks)
+
+
+def get_content_lengths(url_list, number_of_requests=100, loop_backend="default"):
+    """
+    Returns the content lengths of a list of URLs without downloading the files. The head requests are executed
+    concurrently.
+
+    Parameters
+    ----------
+    url_list: list of str
+        The URLs from which the content length should be read.
+    number_of_requests: int, default=100
+        Maximum number of concurrent requests.
+    loop_backend: str, default=default
+        The backend of the event loop ("default" or "uvloop").
+
+    Returns
+    -------
+    content_lengths: dict of {str: int or None}
+        The size of the file (in bytes) for each URL, None if the size is unknown.
+    """
+    if len(url_list) == 0:
+        return {}
+    return dict(run_async(framework_content_lengths(url_list=url_list, number_of_requests=number_of_requests),
+                          loop_backend=loop_backend))
+
+
+def get_url_id(url):
+    """
+    Returns the id part of an URL (or of a head content disposition plus URL string), it is parsed with
+    URL_ID_PATTERN like in parse_hcd__url_list.
+
+    Parameters
+    ----------
+    url: str
+        The URL or the head content disposition plus the URL.
+
+    Returns
+    -------
+    url_id: int or str
+        The id, an empty string if the URL does not end with an id.
+    """
+    match = URL_ID_PATTERN.search(url)
+    if match is None:
+        return ""
+    return int(match.group("url_id"))
+
+
+def parse_hcd__url_list(hcd__url_list):
+    """
+    Extracts the id part of the URL, the year of data acquisition and the tile number from a list of head content
+    dispositions plus URLs. The whole list is parsed at once with HCD__URL_PATTERN. Attachments that are not an
+    orthophoto tile (no tile number or year in the filename) are sorted out.
+
+    Parameters
+    ----------
+    hcd__url_list: list of str
+        A list with the head content dispositions plus the corresponding URLs.
+
+    Returns
+    -------
+    url_id_df: pandas.core.frame.DataFrame
+        Dataframe with the url id (int), year (int) and tile number (categorical) as columns.
+    """
+    url_id_df = pandas.Series(hcd__url_list, dtype=object).str.extract(HCD__URL_PATTERN)
+    # sort out some data that is not relevant
+    url_id_df = url_id_df.dropna().reset_index(drop=True)
+    return url_id_df[["url_id", "year", "tile_number"]].astype({"url_id": "int64", "year": "int64",
+                                                               "tile_number": "category"})
+
+
+def create_ortho_url(url_id):
+    """
+    Returns the download URL of an orthophoto.
+
+    Parameters
+    ----------
+    url_id: int
+        The id part of the URL.
+
+    Returns
+    -------
+    url: str
+        The URL.
+    """
+    return "https://geoportal.geoportal-th.de/gaialight-th/_apps/dladownload/download.php?type=op&id=" + str(url_id)
+
+
+async def check_url_id(session, url_id, attempt, breaker=None):
+    """
+    Requests the head content disposition of the URL of an id.
+
+    Parameters
+    ----------
+    session: aiohttp.client.ClientSession
+        the client session
+    url_id: int
+        The id part of the URL.
+    attempt: int
+        Number of the attempt for this id (starting with 0).
+    breaker: CircuitBreaker or None, default=None
+        The circuit breaker shared by all requests.
+
+    Returns
+    -------
+    url_id: int
+        The id part of the URL.
+    attempt: int
+        Number of the attempt for this id.
+    hcd__url: str
+        The head content disposition plus the URL or only the URL if a key error occurred.
+    key_error: bool
+        Did a key error occur.
+    """
+    url = create_ortho_url(url_id)
+    hcd__url = await get_hcd(session, url, breaker=breaker)
+    return url_id, attempt, hcd__url, hcd__url == url
+
+
+async def crawl_url_ids(start=0, stop=None, number_of_requests=100, retry_policy=None, should_stop=None, url_ids=None,
+                        controller=None, limit_per_host=100):
+    """
+    Asynchronous generator that requests the head content dispositions of the URLs of an id range in one client
+    session. Instead of checking the ids batch by batch, a sliding window keeps requests in flight and the results are
+    yielded as soon as they are completed, so a slow request does not stall the others. The size of the window is
+    adapted by a ConcurrencyController: it grows while the server answers fast and shrinks on timeouts and key errors.
+    Because the URLs are sometimes not reachable for a short time, ids where a key error occurred are checked again
+    after a delay given by the retry policy.
+
+    Parameters
+    ----------
+    start: int
+        The number of the id part of the first URL to be checked.
+    stop: int or None, default=None
+        The number of the id part of the last URL to be checked (exclusive), if None there is no upper limit.
+    number_of_requests: int, default=100
+        Initial number of concurrent requests.
+    retry_policy: RetryPolicy or None, default=None
+        Retry policy for the additional checks of the key error URLs, if None they are checked two more times.
+    should_stop: callable or None, default=None
+        Called with the next id before a new id is requested, no more new ids are requested if it returns True.
+    url_ids: iterable of int or None, default=None
+        The ids to check instead of the id range.
+    controller: ConcurrencyController or None, default=None
+        Adapts the number of concurrent requests, if None a controller that starts with number_of_requests and is
+        limited to ten times this number is used.
+    limit_per_host: int, default=100
+        Maximum number of concurrent connections to the geoportal, independent of the controller. Requests of a larger
+        window wait for a free connection.
+
+    Yields
+    ------
+    url_id: int
+        The id part of the URL.
+    hcd__url: str
+        The head content disposition plus the URL or only the URL if a key error occurred in every check.
+    key_error: bool
+        Did a key error occur in every check.
+    """
+    if retry_policy is None:
+        retry_policy = RetryPolicy(retries=2)
+    # set timeout time / time limit
+    timeout = aiohttp.ClientTimeout(total=12000)
+    if controller is None:
+        controller = ConcurrencyController(start=number_of_requests, minimum=min(10, number_of_requests),
+                                           maximum=10 * number_of_requests)
+    # the circuit breaker pauses all requests if too many of them fail
+    breaker = CircuitBreaker()
+    connector = aiohttp.TCPConnector(limit=controller.maximum, limit_per_host=limit_per_host)
+    loop = asyncio.get_running_loop()
+    if url_ids is None:
+        if stop is None:
+            url_ids = itertools.count(start)
+        else:
+            url_ids = range(start, stop)
+    url_ids = iter(url_ids)
+    exhausted = False
+    pending = set()
+    # start time of the pending requests
+    started = {}
+    # key error ids that are checked again, ordered by the time at which they are due
+    retry_heap = []
+    # create client session so that not every request will open an new connection
+    async with aiohttp.ClientSession(timeout=timeout, connector=connector) as session:
+        while True:
+            # fill the window, due key error ids are checked first
+            while len(pending) < controller.get_limit():
+                if len(retry_heap) > 0 and retry_heap[0][0] <= loop.time():
+                    due_time, url_id, attempt = heapq.heappop(retry_heap)
+                elif exhausted is False:
+                    url_id = next(url_ids, None)
+                    attempt = 0
+                    if url_id is None or should_stop is not None and should_stop(url_id) is True:
+                        exhausted = True
+                        break
+                else:
+                    break
+                task = asyncio.ensure_future(check_url_id(session, url_id, attempt, breaker=breaker))
+                started[task] = time.monotonic()
+                pending.add(task)
+            # wait for the next due key error id if nothing else is left
+            if len(pending) == 0:
+                if len(retry_heap) == 0:
+                    break
+                await asyncio.sleep(retry_heap[0][0] - loop.time())
+                continue
+            wait_timeout = None
+            if len(retry_heap) > 0:
+                wait_timeout = max(0.0, retry_heap[0][0] - loop.time())
+            done, pending = await asyncio.wait(pending, timeout=wait_timeout, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                url_id, attempt, hcd__url, key_error = task.result()
+                start_time = started.pop(task)
+                controller.record(started=start_time, latency=time.monotonic() - start_time, congestion=key_error)
+                if key_error is True and attempt < retry_policy.retries:
+                    heapq.heappush(retry_heap, (loop.time() + retry_policy.delay(attempt), url_id, attempt + 1))
+                else:
+                    yield url_id, hcd__url, key_error
+
+
+async def framework_url_id_file(url_id_file, key_error_file, start=0, stop=None, url_ids=None,
+                                number_of_requests=100, retry_policy=None):
+    """
+    Framework function of create_url_id_file and retry_url_key_errors. The results of crawl_url_ids are streamed into
+    the URL id file, which is appended every number_of_requests results. The key error URLs are appended to the key
+    error file.
+
+    Parameters
+    ----------
+    url_id_file: str
+        Path to the URL id file (url_id_file.csv).
+    key_error_file: str
+        Path to the file with the key error URLs (url_KeyError.csv).
+    start: int, default=0
+        The number of the id part of the first URL to be checked.
+    stop: int or None, default=None
+        The number of the id part of the last URL to be checked (exclusive).
+    url_ids: list of int or None, default=None
+        The ids to check instead of the id range.
+    number_of_requests: int, default=100
+        Maximum number of concurrent requests.
+    retry_policy: RetryPolicy or None, default=None
+        Retry policy for the additional checks of the key error URLs.
+
+    Returns
+    -------
+    new_rows: int
+        The number of orthophotos that were added to the URL id file.
+    """
+    hcd__url_list = list()
+    url_key_error_list = list()
+    new_rows = 0
+    if url_ids is not None:
+        total = len(url_ids)
+    else:
+        total = stop - start
+    with tqdm(total=total) as progress:
+        async for url_id, hcd__url, key_error in crawl_url_ids(start=start, stop=stop, url_ids=url_ids,
+                                                               number_of_requests=number_of_requests,
+                                                               retry_policy=retry_policy):
+            if key_error is True:
+                url_key_error_list.append(hcd__url)
+            else:
+                hcd__url_list.append(hcd__url)
+            progress.update(1)
+            # write the collected results
+            if len(hcd__url_list) + len(url_key_error_list) >= number_of_requests:
+                new_rows = new_rows + append_url_id_rows(url_id_file, hcd__url_list, set())
+                append_url_key_errors(key_error_file, url_key_error_list)
+                hcd__url_list = list()
+                url_key_error_list = list()
+    new_rows = new_rows + append_url_id_rows(url_id_file, hcd__url_list, set())
+    append_url_key_errors(key_error_file, url_key_error_list)
+    return new_rows
+
+
+def append_url_key_errors(key_error_file, url_key_error_list):
+    """
+    Appends key error URLs to the file with the key error URLs, which is the queue for retry_url_key_errors.
+
+    Parameters
+    ----------
+    key_error_file: str
+        Path to the file with the key error URLs (url_KeyError.csv).
+    url_key_error_list: list of str
+        A list with the key error URLs.
+
+    Returns
+    -------
+    """
+    if len(url_key_error_list) == 0:
+        return
+    error_df = pandas.DataFrame({"error_urls": url_key_error_list})
+    error_df.to_csv(key_error_file, mode="a", header=not os.path.exists(key_error_file), index=False)
+
+
+def create_url_id_file(start, stop, out_path, number_of_requests=100, retry_policy=None, loop_backend="default"):
+    """
+    This function creates a CSV file with the id part ot the URL, the year of data acquisition and the tile number as
+    columns (url_id_file.csv) and a CSV file with the URLs where a key error occurred (url_KeyError.csv). To achieve
+    this, the ids are checked by crawl_url_ids in one event loop to get the head content dispositions or in case of a
+    key error the URL. The information is filtered and streamed into the two files while the check is running.
+
+    Parameters
+    ----------
+    start: int
+        The number of the id part of the first URL to be checked.
+    stop: int
+        The number of the id part of the last URL to be checked.
+    out_path: str
+        Path to the folder where the output should be stored.
+    number_of_requests: int
+        Initial number of concurrent requests, it is adapted to the load of the server while the check is running.
+    retry_policy: RetryPolicy or None, default=None
+        Retry policy for the additional checks of the key error URLs, if None they are checked two more times.
+    loop_backend: str, default=default
+        The backend of the event loop ("default" or "uvloop").
+
+    Returns
+    -------
+    path_name: str
+        The path to the URL id file.
+    """
+    path_name = out_path + "url_id_file.csv"
+    key_error_file = out_path + "url_KeyError.csv"
+    # start with an empty file
+    pandas.DataFrame(columns=["url_id", "year", "tile_number"]).to_csv(path_name, index=False)
+    if os.path.exists(key_error_file):
+        os.remove(key_error_file)
+    new_rows = run_async(framework_url_id_file(url_id_file=path_name, key_error_file=key_error_file, start=start,
+                                               stop=stop, number_of_requests=number_of_requests,
+                                               retry_policy=retry_policy), loop_backend=loop_backend)
+    if new_rows == 0:
+        print("There are no orthophotos in the id range.")
+    return path_name
+
+
+def retry_url_key_errors(out_path, number_of_requests=100, retry_policy=None, loop_backend="default"):
+    """
+    Checks the URLs of the key error file (url_KeyError.csv) again. The orthophotos that are found are appended to
+    the URL id file and the URLs where a key error occurred again stay in the key error file.
+
+    Parameters
+    ----------
+    out_path: str
+        Path to the folder with the URL id file and the key error file.
+    number_of_requests: int, default=100
+        Maximum number of concurrent requests.
+    retry_policy: RetryPolicy or None, default=None
+        Retry policy for the additional checks of the key error URLs, if None they are checked two more times.
+    loop_backend: str, default=default
+        The backend of the event loop ("default" or "uvloop").
+
+    Returns
+    -------
+    new_rows: int
+        The number of orthophotos that were added to the URL id file.
+    """
+    key_error_file = out_path + "url_KeyError.csv"
+    if not os.path.exists(key_error_file):
+        return 0
+    url_ids = [get_url_id(url) for url in pandas.read_csv(key_error_file)["error_urls"]]
+    # the key errors that occur again are written into a new queue, which replaces the old one only at the end, so
+    # the queue is not lost if the retry is interrupted
+    new_key_error_file = key_error_file + ".tmp"
+    if os.path.exists(new_key_error_file):
+        os.remove(new_key_error_file)
+    new_rows = run_async(framework_url_id_file(url_id_file=out_path + "url_id_file.csv",
+                                               key_error_file=new_key_error_file, url_ids=url_ids,
+                                               number_of_requests=number_of_requests, retry_policy=retry_policy),
+                         loop_backend=loop_backend)
+    if os.path.exists(new_key_error_file):
+        os.replace(new_key_error_file, key_error_file)
+    else:
+        os.remove(key_error_file)
+    return new_rows
+
+
+def append_url_id_rows(url_id_file, hcd__url_list, known_url_ids):
+    """
+    Appends the orthophotos of a list of head content dispositions plus URLs to the URL id file. Orthophotos whose
+    url id is already known are not appended again.
+
+    Parameters
+    ----------
+    url_id_file: str
+        Path to the URL id file (url_id_file.csv).
+    hcd__url_list: list of str
+        A list with the head content dispositions plus the corresponding URLs.
+    known_url_ids: set of int
+        The url ids that are already in the file.
+
+    Returns
+    -------
+    new_rows: int
+        The number of appended orthophotos.
+    """
+    if len(hcd__url_list) == 0:
+        return 0
+    url_id_df = parse_hcd__url_list(hcd__url_list=hcd__url_list)
+    url_id_df = url_id_df[~url_id_df["url_id"].isin(known_url_ids)].sort_values("url_id")
+    url_id_df.to_csv(url_id_file, mode="a", header=False, index=False)
+    return len(url_id_df)
+
+
+def update_url_id_file(url_id_file, max_misses=2000, number_of_requests=100, retry_policy=None,
+                       loop_backend="default"):
+    """
+    Updates an existing URL id file incrementally. The check starts just past the highest known url id and new
+    orthophotos are appended to the file. The progress is saved in a checkpoint file (url_id_file + ".checkpoint"),
+    so an interrupted update continues where it stopped. The update stops after a number of consecutive ids without
+    a file.
+
+    Parameters
+    ----------
+    url_id_file: str
+        Path to the URL id file (url_id_file.csv).
+    max_misses: int, default=2000
+        Number of consecutive ids without a file after which the update stops.
+    number_of_requests: int, default=100
+        Maximum number of concurrent requests.
+    retry_policy: RetryPolicy or None, default=None
+        Retry policy for the additional checks of the key error URLs, if None they are checked two more times.
+    loop_backend: str, default=default
+        The backend of the event loop ("default" or "uvloop").
+
+    Returns
+    -------
+    new_rows: int
+        The number of orthophotos that were added to the URL id file.
+    """
+    return run_async(framework_update_url_id_file(url_id_file=url_id_file, max_misses=max_misses,
+                                                  number_of_requests=number_of_requests, retry_policy=retry_policy),
+                     loop_backend=loop_backend)
+
+
+async def framework_update_url_id_file(url_id_file, max_misses=2000, number_of_requests=100, retry_policy=None):
+    """
+    Framework function of update_url_id_file. Because the results of crawl_url_ids are not ordered, the checkpoint
+    contains the lowest id that is not yet completed, ids above it that are already in the file are not appended again.
+    Ids below the highest hit where a key error occurred in every check are appended to the key error file
+    (url_KeyError.csv in the folder of the URL id file), so they can be checked again by retry_url_key_errors. The
+    key errors above the highest hit are the ids after the last orthophoto, which are checked by the next update.
+
+    Parameters
+    ----------
+    url_id_file: str
+        Path to the URL id file (url_id_file.csv).
+    max_misses: int, default=2000
+        Number of consecutive ids without a file after which the update stops.
+    number_of_requests: int, default=100
+        Maximum number of concurrent requests.
+    retry_policy: RetryPolicy or None, default=None
+        Retry policy for the additional checks of the key error URLs.
+
+    Returns
+    -------
+    new_rows: int
+        The number of orthophotos that were added to the URL id file.
+    """
+    # start just past the highest known id or at the checkpoint of an interrupted update
+    url_id_df = pandas.read_csv(url_id_file)
+    known_url_ids = set(url_id_df["url_id"])
+    last_hit = int(url_id_df["url_id"].max())
+    watermark = last_hit + 1
+    checkpoint_file = url_id_file + ".checkpoint"
+    if os.path.exists(checkpoint_file):
+        with open(checkpoint_file, "r") as checkpoint:
+            watermark, last_hit = [int(value) for value in checkpoint.read().split(",")]
+        # the key errors above the highest hit were not saved yet, so they are checked again
+        watermark = min(watermark, last_hit + 1)
+    key_error_file = os.path.join(os.path.dirname(url_id_file), "url_KeyError.csv")
+    # ids that are completed but above the watermark
+    completed = set()
+    hcd__url_list = list()
+    url_key_error_list = list()
+    new_rows = 0
+    with tqdm() as progress:
+        async for url_id, hcd__url, key_error in crawl_url_ids(start=watermark,
+                                                               number_of_requests=number_of_requests,
+                                                               retry_policy=retry_policy,
+                                                               should_stop=lambda next_id:
+                                                               next_id - last_hit - 1 >= max_misses):
+            # every id with a head content disposition is a hit (also if it is not an orthophoto tile)
+            if key_error is False:
+                hcd__url_list.append(hcd__url)
+                last_hit = max(last_hit, url_id)
+            else:
+                url_key_error_list.append((url_id, hcd__url))
+            completed.add(url_id)
+            while watermark in completed:
+                completed.remove(watermark)
+                watermark = watermark + 1
+            progress.update(1)
+            if len(hcd__url_list) >= number_of_requests:
+                new_rows = new_rows + append_url_id_rows(url_id_file, hcd__url_list, known_url_ids)
+                hcd__url_list = list()
+                url_key_error_list = save_url_key_errors(key_error_file, url_key_error_list, last_hit)
+                # save the progress (everything below the watermark is in the file now)
+                with open(checkpoint_file, "w") as checkpoint:
+                    checkpoint.write(str(watermark) + "," + str(last_hit))
+        new_rows = new_rows + append_url_id_rows(url_id_file, hcd__url_list, known_url_ids)
+        save_url_key_errors(key_error_file, url_key_error_list, last_hit)
+    # the update is finished
+    if os.path.exists(checkpoint_file):
+        os.remove(checkpoint_file)
+    return new_rows
+
+
+def save_url_key_errors(key_error_file, url_key_error_list, last_hit):
+    """
+    Appends the key error URLs of the ids below the highest hit to the key error file (see append_url_key_errors).
+
+    Parameters
+    ----------
+    key_error_file: str
+        Path to the file with the key error URLs (url_KeyError.csv).
+    url_key_error_list: list of tuple
+        A list with the id and the URL of each key error.
+    last_hit: int
+        The highest id with a head content disposition.
+
+    Returns
+    -------
+    url_key_error_list: list of tuple
+        The key errors above the highest hit, which were not appended.
+    """
+    append_url_key_errors(key_error_file, [url for url_id, url in url_key_error_list if url_id < last_hit])
+    return [(url_id, url) for url_id, url in url_key_error_list if url_id > last_hit]
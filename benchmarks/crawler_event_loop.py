@@ -0,0 +1,92 @@
+# import packages
+import argparse
+import multiprocessing
+import os
+import socket
+import sys
+import time
+from aiohttp import web
+
+# the benchmark is located in a subfolder of the repository
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import _aux
+
+
+def run_stand_in_server(port):
+    """
+    Runs a local stand-in for the download.php of the geoportal. Every id returns a content disposition of an
+    orthophoto tile.
+
+    Parameters
+    ----------
+    port: int
+        The port of the server.
+
+    Returns
+    -------
+    """
+    async def head(request):
+        url_id = int(request.query["id"])
+        headers = {"content-disposition": 'attachment; filename="dop20rgbi_32_{}_{}_2_th_2019.zip"'
+                   .format(600 + url_id % 100, 5600 + url_id % 100)}
+        return web.Response(headers=headers)
+
+    app = web.Application()
+    app.router.add_route("HEAD", "/download.php", head)
+    web.run_app(app, host="127.0.0.1", port=port, print=None, access_log=None)
+
+
+async def crawl(number_of_ids, number_of_requests):
+    """
+    Checks number_of_ids ids with crawl_url_ids and returns the number of results.
+
+    Parameters
+    ----------
+    number_of_ids: int
+        Number of ids to check.
+    number_of_requests: int
+        Initial number of concurrent requests.
+
+    Returns
+    -------
+    results: int
+        The number of results.
+    """
+    results = 0
+    async for _ in _aux.crawl_url_ids(start=0, stop=number_of_ids, number_of_requests=number_of_requests):
+        results = results + 1
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compares the requests/s of the URL id crawler with the default "
+                                                 "event loop and with uvloop against a local stand-in server.")
+    parser.add_argument("--ids", type=int, default=20000, help="number of ids per run")
+    parser.add_argument("--requests", type=int, default=100, help="initial number of concurrent requests")
+    parser.add_argument("--repeat", type=int, default=3, help="number of runs per backend")
+    args = parser.parse_args()
+
+    # find a free port and start the server in its own process
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+    server = multiprocessing.Process(target=run_stand_in_server, args=(port,), daemon=True)
+    server.start()
+    time.sleep(1)
+    # send the requests of the crawler to the stand-in server
+    _aux.create_ortho_url = lambda url_id: "http://127.0.0.1:{}/download.php?type=op&id={}".format(port, url_id)
+    try:
+        for loop_backend in ["default", "uvloop"]:
+            rates = []
+            for _ in range(args.repeat):
+                start_time = time.perf_counter()
+                _aux.run_async(crawl(args.ids, args.requests), loop_backend=loop_backend)
+                rates.append(args.ids / (time.perf_counter() - start_time))
+            print("{:<8} best {:>8.0f} requests/s, mean {:>8.0f} requests/s".format(
+                loop_backend, max(rates), sum(rates) / len(rates)))
+    finally:
+        server.terminate()
+
+
+if __name__ == "__main__":
+    main()